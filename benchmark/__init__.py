@@ -0,0 +1 @@
+# Shared helpers for the Polars vs Pandas benchmark pages
@@ -0,0 +1,50 @@
+import contextlib
+import os
+import threading
+import time
+
+# Heavy queries the pages let run at once across every session of the server, 0 for no limit.
+# Each one uses the whole Polars thread pool, so running many together only oversubscribes the cores
+MAX_HEAVY_QUERIES_ENV = "BENCHMARK_MAX_HEAVY_QUERIES"
+
+
+# Bounds how many heavy queries run at once; the rest wait for a slot.
+# Streamlit runs every session as a thread of one process, so a semaphore covers them all
+class AdmissionGate:
+    def __init__(self, max_concurrent=None):
+        self.max_concurrent = max_concurrent or None
+        self._semaphore = threading.Semaphore(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.peak_running = 0
+        self.peak_queued = 0
+
+    # Context manager to run one heavy query, waiting for a slot first. Yields a dict whose wait_s is
+    # the time spent queued
+    @contextlib.contextmanager
+    def admit(self):
+        admission = {"wait_s": 0.0}
+        if self._semaphore is not None and not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.queued += 1
+                self.peak_queued = max(self.peak_queued, self.queued)
+            start_time = time.perf_counter()
+            self._semaphore.acquire()
+            admission["wait_s"] = time.perf_counter() - start_time
+            with self._lock:
+                self.queued -= 1
+        with self._lock:
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        try:
+            yield admission
+        finally:
+            with self._lock:
+                self.running -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+
+# The gate the pages share, sized from the environment when the server starts
+GATE = AdmissionGate(int(os.environ.get(MAX_HEAVY_QUERIES_ENV) or 0))
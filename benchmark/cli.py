@@ -0,0 +1,113 @@
+import argparse
+
+from benchmark import external_sort
+from benchmark import history
+from benchmark import interop
+from benchmark import loaders
+from benchmark import manifest
+from benchmark import operations
+from benchmark import partitioned
+from benchmark import results
+from benchmark import runner
+from benchmark import scaling
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark",
+        description="Run the Polars vs Pandas benchmark matrix (engine x size tier x operation) without the browser",
+    )
+    parser.add_argument("--data-glob", default="archive/*.csv", help="CSV files to benchmark (default: %(default)s)")
+    parser.add_argument("--files", nargs="+", help="Exact CSV files to benchmark, in order (overrides --data-glob, whose matches are sorted by path)")
+    parser.add_argument("--tiers", type=float, nargs="+", default=[1, 2, 3], help="Size tiers in GB (default: 1 2 3)")
+    parser.add_argument("--engines", nargs="+", choices=runner.ENGINES, default=runner.ENGINES)
+    parser.add_argument("--columnar-cache", choices=["parquet", "ipc"], help="Read through the columnar cache in this format instead of raw CSV")
+    parser.add_argument("--mode", choices=list(operations.MODES), default="eager",
+                        help="What the timed region includes: eager (operation on an in-memory frame) or end_to_end (read + compute)")
+    parser.add_argument("--pandas-ingest", choices=loaders.PANDAS_INGEST_MODES, default="chunked",
+                        help="chunked: serial read_csv in 5000-row chunks; parallel: whole files in a process pool with the pyarrow parser; "
+                             "arrow: whole files into pyarrow-backed dtypes")
+    parser.add_argument("--ingest-workers", type=int, help="Process pool size for the parallel pandas ingest (default: CPU count)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before each measurement (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per measurement (default: %(default)s)")
+    parser.add_argument("--cold", action="store_true", help="Drop the files from the page cache before every timed read")
+    parser.add_argument("--isolated", action="store_true", help="Run each engine and size tier in a fresh worker process")
+    parser.add_argument("--memory-limit-gb", type=float, help="RLIMIT_AS cap for isolated workers")
+    parser.add_argument("--thread-scaling", type=int, metavar="MAX_THREADS", nargs="?", const=0,
+                        help="Rerun Polars with POLARS_MAX_THREADS at 1, 2, 4 ... MAX_THREADS (default: CPU count) against single-threaded pandas")
+    parser.add_argument("--external-sort", type=float, metavar="BUDGET_GB",
+                        help="Instead of the operations, sort every tier by date out of core: Polars' streaming sort against pandas sorted runs merged from Arrow IPC files within this memory budget")
+    parser.add_argument("--merge-fan-in", type=int, help="Runs merged at once by the pandas external sort (default: as many as the budget allows)")
+    parser.add_argument("--interop", action="store_true",
+                        help="Instead of the operations, time the Polars <-> pandas conversions of every tier, with pandas loaded into pyarrow-backed dtypes, and report which buffers are shared")
+    parser.add_argument("--selective-queries", action="store_true",
+                        help=f"Instead of the operations, time narrow company and date queries as full and as pruned scans of a copy of the files partitioned by company and year in {partitioned.PARTITIONED_DIR}/")
+    parser.add_argument("--output", help="Results file, .json or .csv (default: benchmark_results/run-<timestamp>.json)")
+    parser.add_argument("--no-history", action="store_true", help=f"Do not append the run to the results history in {history.HISTORY_DIR}/")
+    return parser.parse_args(argv)
+
+
+# Function to turn parsed arguments into the keyword options of runner.run_matrix
+def run_options_from_args(args):
+    return {
+        "mode": args.mode,
+        "warmup": args.warmup,
+        "repeats": args.repeats,
+        "cold_cache": args.cold,
+        "isolated": args.isolated,
+        "memory_limit_gb": args.memory_limit_gb,
+        "use_columnar_cache": args.columnar_cache is not None,
+        "cache_format": args.columnar_cache or "parquet",
+        "pandas_ingest": args.pandas_ingest,
+        "ingest_workers": args.ingest_workers,
+    }
+
+
+# Function to turn run_matrix keyword options back into command-line arguments, the inverse of
+# run_options_from_args, so a run can be repeated in a child process
+def args_from_run_options(mode="eager", warmup=1, repeats=5, cold_cache=False, isolated=False, memory_limit_gb=None,
+                          use_columnar_cache=False, cache_format="parquet", pandas_ingest="chunked", ingest_workers=None):
+    argv = ["--mode", mode, "--warmup", str(warmup), "--repeats", str(repeats), "--pandas-ingest", pandas_ingest]
+    if cold_cache:
+        argv.append("--cold")
+    if isolated:
+        argv.append("--isolated")
+    if memory_limit_gb:
+        argv += ["--memory-limit-gb", str(memory_limit_gb)]
+    if use_columnar_cache:
+        argv += ["--columnar-cache", cache_format]
+    if ingest_workers:
+        argv += ["--ingest-workers", str(ingest_workers)]
+    return argv
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    file_paths = args.files or manifest.discover(args.data_glob)
+    if not file_paths:
+        raise SystemExit(f"No files match {args.data_glob}")
+
+    # Whole-number tiers print as "1 GB" rather than "1.0 GB"
+    size_tiers_gb = [int(tier) if float(tier).is_integer() else tier for tier in args.tiers]
+    if args.thread_scaling is not None:
+        thread_counts = scaling.thread_counts(args.thread_scaling or None)
+        run = scaling.run_thread_scaling(file_paths, size_tiers_gb, thread_counts, **run_options_from_args(args))
+    elif args.interop:
+        run = interop.run_interop(file_paths, size_tiers_gb, **run_options_from_args(args))
+    elif args.selective_queries:
+        run = partitioned.run_selective_queries(file_paths, args.engines, **run_options_from_args(args))
+    elif args.external_sort is not None:
+        run = external_sort.run_external_sort(file_paths, size_tiers_gb, args.engines, args.external_sort, args.merge_fan_in,
+                                              **run_options_from_args(args))
+    else:
+        run = runner.run_matrix(file_paths, size_tiers_gb, args.engines, **run_options_from_args(args))
+    output_path = results.write_results(run, args.output or results.default_output_path())
+    if not args.no_history:
+        history.append_run(run)
+    for message in [record["message"] for record in run["records"] if record["status"] != "ok"]:
+        print(message)
+    print(f"Wrote {len(run['records'])} results to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
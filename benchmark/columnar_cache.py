@@ -0,0 +1,104 @@
+import hashlib
+import os
+import time
+
+import pandas as pd
+import polars as pl
+
+from benchmark import schema
+
+# Converted files live next to the app so every page and every run shares them
+CACHE_DIR = ".columnar_cache"
+CACHE_FORMATS = {"parquet": "parquet", "ipc": "arrow"}
+
+
+# Function to build the cache file name for a CSV. The first part identifies the source path and
+# the second part its size, mtime and the schema version, so an edited CSV or a changed schema gets
+# a new entry instead of a stale hit
+def cache_file_path(csv_path, fmt="parquet", cache_dir=CACHE_DIR):
+    stat = os.stat(csv_path)
+    path_key = hashlib.sha1(os.path.abspath(csv_path).encode()).hexdigest()[:16]
+    state_key = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}:{schema.SCHEMA_VERSION}".encode()).hexdigest()[:16]
+    stem = os.path.basename(csv_path).rsplit(".", 1)[0]
+    return os.path.join(cache_dir, f"{stem}-{path_key}-{state_key}.{CACHE_FORMATS[fmt]}")
+
+
+# Function to convert a CSV to Parquet/IPC once and return the cached file path.
+# Returns the path and the conversion time (0 when the cache was already warm)
+def ensure_cached(csv_path, fmt="parquet", cache_dir=CACHE_DIR):
+    cached_path = cache_file_path(csv_path, fmt, cache_dir)
+    if os.path.exists(cached_path):
+        return cached_path, 0.0
+
+    os.makedirs(cache_dir, exist_ok=True)
+    start_time = time.time()
+    # Write to a temporary name first so a crashed conversion never looks like a valid entry
+    tmp_path = f"{cached_path}.tmp-{os.getpid()}"
+    # Cached files carry the declared types, so reading them back needs no parsing or casting
+    lazy_df = pl.scan_csv(csv_path, schema_overrides=schema.POLARS_SCHEMA)
+    if fmt == "parquet":
+        lazy_df.sink_parquet(tmp_path)
+    else:
+        lazy_df.sink_ipc(tmp_path)
+    os.replace(tmp_path, cached_path)
+    conversion_time = time.time() - start_time
+
+    # Drop entries for older versions of the same CSV
+    prefix = os.path.basename(cached_path).rsplit("-", 1)[0]
+    for file_name in os.listdir(cache_dir):
+        file_path = os.path.join(cache_dir, file_name)
+        same_format = file_name.rsplit(".", 1)[-1] == CACHE_FORMATS[fmt]
+        if file_name.startswith(prefix + "-") and same_format and file_path != cached_path:
+            os.remove(file_path)
+    return cached_path, conversion_time
+
+
+# Function to lazily scan a CSV through the cache
+def scan_cached(csv_path, fmt="parquet"):
+    cached_path, _ = ensure_cached(csv_path, fmt)
+    if fmt == "parquet":
+        return pl.scan_parquet(cached_path)
+    return pl.scan_ipc(cached_path)
+
+
+# Function to read a CSV into pandas through the cache
+def read_cached_pandas(csv_path, fmt="parquet", columns=None, dtype_backend=None):
+    cached_path, _ = ensure_cached(csv_path, fmt)
+    backend_options = {"dtype_backend": dtype_backend} if dtype_backend else {}
+    if fmt == "parquet":
+        return pd.read_parquet(cached_path, columns=columns, **backend_options)
+    return pd.read_feather(cached_path, columns=columns, **backend_options)
+
+
+# Function to time a full read of the files as raw CSV (cold format) and from the columnar
+# cache (warm format) for both engines. Conversion happens up front and is reported separately
+def compare_read_times(file_paths, fmt="parquet"):
+    conversion_time = 0.0
+    for file_path in file_paths:
+        conversion_time += ensure_cached(file_path, fmt)[1]
+
+    start_time = time.time()
+    pl.concat([pl.scan_csv(file_path, schema_overrides=schema.POLARS_SCHEMA) for file_path in file_paths]).collect()
+    polars_csv_time = time.time() - start_time
+
+    start_time = time.time()
+    pl.concat([scan_cached(file_path, fmt) for file_path in file_paths]).collect()
+    polars_columnar_time = time.time() - start_time
+
+    start_time = time.time()
+    pd.concat([pd.read_csv(file_path, **schema.pandas_read_options()) for file_path in file_paths], ignore_index=True)
+    pandas_csv_time = time.time() - start_time
+
+    start_time = time.time()
+    pd.concat([read_cached_pandas(file_path, fmt) for file_path in file_paths], ignore_index=True)
+    pandas_columnar_time = time.time() - start_time
+
+    rows = [
+        {"Engine": "Polars", "Cold CSV Read (s)": round(polars_csv_time, 2),
+         f"Warm {fmt.upper()} Read (s)": round(polars_columnar_time, 2),
+         "Speedup": round(polars_csv_time / max(polars_columnar_time, 1e-9), 1)},
+        {"Engine": "Pandas", "Cold CSV Read (s)": round(pandas_csv_time, 2),
+         f"Warm {fmt.upper()} Read (s)": round(pandas_columnar_time, 2),
+         "Speedup": round(pandas_csv_time / max(pandas_columnar_time, 1e-9), 1)},
+    ]
+    return rows, conversion_time
@@ -0,0 +1,339 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from benchmark import isolation
+from benchmark import loaders
+from benchmark import memory
+from benchmark import operations
+from benchmark import progress
+from benchmark import runner
+from benchmark import schema
+from benchmark import streaming
+from benchmark import timing
+
+SORT_KEY = "date"
+DEFAULT_MEMORY_BUDGET_GB = 0.25
+
+# Rough in-memory bytes of one selected row (date, close and volume at 8 bytes, Stock_Name codes),
+# and how many copies a sort holds at once: the input, the sorted output and the argsort indices
+ROW_BYTES = 32
+SORT_COPIES = 3
+# Rows per batch in the spilled runs; the merge holds one batch of every run it merges
+MERGE_BATCH_ROWS = 65_536
+
+
+# Function to size the external sort from the memory budget: rows per sorted run, and how many runs
+# one merge can read at once with a batch of each in memory plus the merged output
+def sort_plan(memory_budget_bytes):
+    run_rows = max(MERGE_BATCH_ROWS, memory_budget_bytes // (ROW_BYTES * SORT_COPIES))
+    fan_in = max(2, memory_budget_bytes // (2 * MERGE_BATCH_ROWS * ROW_BYTES) - 1)
+    return {"run_rows": int(run_rows), "fan_in": int(fan_in)}
+
+
+# Function to write a table to an uncompressed Arrow IPC file in MERGE_BATCH_ROWS batches, so it can be
+# memory-mapped and read back a batch at a time. Returns the bytes written
+def write_run(table, run_path):
+    with pa.OSFile(run_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=MERGE_BATCH_ROWS):
+            writer.write_batch(batch)
+    return os.path.getsize(run_path)
+
+
+# Reads one spilled run a batch at a time. The file is read rather than memory-mapped, so a merge
+# maps no more address space than the batches it holds, which the memory cap counts
+class RunReader:
+    def __init__(self, run_path):
+        self._source = pa.OSFile(run_path, "rb")
+        self._reader = pa.ipc.open_file(self._source)
+        self.schema = self._reader.schema
+        self._batch_index = 0
+        self.batch = None
+        self.keys = None
+        self.position = 0
+        self.next_batch()
+
+    def next_batch(self):
+        if self._batch_index >= self._reader.num_record_batches:
+            self.batch = None
+            return
+        self.batch = self._reader.get_batch(self._batch_index)
+        self._batch_index += 1
+        self.keys = self.batch.column(SORT_KEY).cast(pa.int64()).to_numpy()
+        self.position = 0
+
+    def close(self):
+        self._source.close()
+
+
+# Function to k-way merge sorted runs into one sorted run. Works a slice at a time: the smallest
+# last key among the runs' current batches is a cutoff every row up to which is final, so those rows
+# are taken from each run, sorted together and written; a run whose batch is used up loads its next one
+def merge_runs(run_paths, output_path):
+    readers = [RunReader(run_path) for run_path in run_paths]
+    try:
+        with pa.OSFile(output_path, "wb") as sink, pa.ipc.new_file(sink, readers[0].schema) as writer:
+            while True:
+                live_readers = [reader for reader in readers if reader.batch is not None]
+                if not live_readers:
+                    break
+                cutoff = min(reader.keys[-1] for reader in live_readers)
+                slices = []
+                slice_keys = []
+                for reader in live_readers:
+                    end = int(np.searchsorted(reader.keys, cutoff, side="right"))
+                    if end > reader.position:
+                        slices.append(reader.batch.slice(reader.position, end - reader.position))
+                        slice_keys.append(reader.keys[reader.position:end])
+                        reader.position = end
+                    if reader.position >= len(reader.keys):
+                        reader.next_batch()
+                merged = pa.Table.from_batches(slices)
+                order = np.argsort(np.concatenate(slice_keys), kind="stable")
+                for batch in merged.take(order).to_batches(max_chunksize=MERGE_BATCH_ROWS):
+                    writer.write_batch(batch)
+    finally:
+        for reader in readers:
+            reader.close()
+    return os.path.getsize(output_path)
+
+
+# Function to sort the selected columns of the files by date in pandas within a memory budget:
+# gather chunks across files until a run is full, sort it with sort_values and spill it as an Arrow
+# IPC run, then merge fan_in runs at a time until one is left. Returns rows, spilled bytes, runs and
+# merge passes
+def external_sort_pandas(file_paths, output_path, memory_budget_bytes, spill_dir, fan_in=None,
+                         use_columnar_cache=False, cache_format="parquet", **loader_options):
+    plan = sort_plan(memory_budget_bytes)
+    fan_in = fan_in or plan["fan_in"]
+    read_columns = [column for column in operations.SELECTED_COLUMNS if column != "Stock_Name"]
+    rows = 0
+    spill_bytes = 0
+    run_paths = []
+    pending_chunks = []
+    pending_rows = 0
+
+    # Every run shares one Stock_Name dictionary: an IPC file holds a single dictionary per column,
+    # so the merged batches must agree on it
+    companies = sorted({schema.company_name(file_path) for file_path in file_paths})
+
+    def spill_run():
+        sorted_run = schema.concat_pandas(pending_chunks).sort_values(SORT_KEY, kind="stable")
+        sorted_run["Stock_Name"] = sorted_run["Stock_Name"].cat.set_categories(companies)
+        run_path = os.path.join(spill_dir, f"run-0-{len(run_paths)}.arrow")
+        run_paths.append(run_path)
+        return write_run(pa.Table.from_pandas(sorted_run[operations.SELECTED_COLUMNS], preserve_index=False), run_path)
+
+    # Chunks are a quarter of a run so a full run never overshoots the budget by much
+    chunk_rows = max(MERGE_BATCH_ROWS, plan["run_rows"] // 4)
+    for file_path in file_paths:
+        for chunk in streaming.iter_pandas_chunks(file_path, read_columns, chunk_rows, use_columnar_cache, cache_format):
+            pending_chunks.append(schema.add_stock_name_pandas(chunk, file_path))
+            pending_rows += len(chunk)
+            rows += len(chunk)
+            if pending_rows >= plan["run_rows"]:
+                spill_bytes += spill_run()
+                pending_chunks, pending_rows = [], 0
+        progress.report("sort_runs", path=file_path, runs=len(run_paths))
+    if pending_chunks:
+        spill_bytes += spill_run()
+
+    runs = len(run_paths)
+    merge_passes = 0
+    if len(run_paths) == 1:
+        # A single run is already the sorted output, so nothing was spilled
+        spill_bytes = 0
+        shutil.move(run_paths[0], output_path)
+    while len(run_paths) > 1:
+        merge_passes += 1
+        last_pass = len(run_paths) <= fan_in
+        merged_paths = []
+        for group_start in range(0, len(run_paths), fan_in):
+            group = run_paths[group_start:group_start + fan_in]
+            if last_pass:
+                merged_path = output_path
+            else:
+                merged_path = os.path.join(spill_dir, f"run-{merge_passes}-{len(merged_paths)}.arrow")
+            written_bytes = merge_runs(group, merged_path) if len(group) > 1 else os.path.getsize(shutil.move(group[0], merged_path))
+            if not last_pass:
+                spill_bytes += written_bytes
+            for run_path in group:
+                if os.path.exists(run_path):
+                    os.remove(run_path)
+            merged_paths.append(merged_path)
+        run_paths = merged_paths
+        progress.report("merge_pass", merge_pass=merge_passes, runs=len(run_paths))
+    return {"rows": rows, "spill_bytes": spill_bytes, "runs": runs, "merge_passes": merge_passes}
+
+
+# Function to read this process's bytes written through write calls, from /proc/self/io
+def written_bytes():
+    try:
+        with open("/proc/self/io") as io_file:
+            for line in io_file:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# Function to sort the selected columns of the files by date with Polars' streaming engine straight
+# into an Arrow IPC file. The streaming sort holds its input in memory; anything it does spill goes to
+# POLARS_TEMP_DIR, pointed at spill_dir for the call only. Spill bytes are measured rather than
+# assumed: what the process wrote beyond the output file, where /proc/self/io is available, which is
+# next to nothing in practice. Runs and merge passes are internal to Polars
+def external_sort_polars(file_paths, output_path, memory_budget_bytes, spill_dir, fan_in=None, **loader_options):
+    previous_temp_dir = os.environ.get("POLARS_TEMP_DIR")
+    os.environ["POLARS_TEMP_DIR"] = spill_dir
+    try:
+        written_before = written_bytes()
+        lazy_df = loaders.scan_files(file_paths, **loader_options).select(operations.SELECTED_COLUMNS).sort(SORT_KEY)
+        lazy_df.sink_ipc(output_path, engine="streaming")
+        written_after = written_bytes()
+    finally:
+        if previous_temp_dir is None:
+            os.environ.pop("POLARS_TEMP_DIR", None)
+        else:
+            os.environ["POLARS_TEMP_DIR"] = previous_temp_dir
+    spill_bytes = None
+    if written_before is not None and written_after is not None:
+        spill_bytes = max(written_after - written_before - os.path.getsize(output_path), 0)
+    return {"rows": None, "spill_bytes": spill_bytes, "runs": None, "merge_passes": None}
+
+
+# Function to run an engine's sort pipeline on one row of a file, so the threads and buffers it keeps
+# for the process (Polars' streaming engine, pyarrow's pools) are up before the memory cap
+def warm_up_sort(engine, file_path, output_path, use_columnar_cache=False, cache_format="parquet", **loader_options):
+    if engine == "Pandas":
+        read_columns = [column for column in operations.SELECTED_COLUMNS if column != "Stock_Name"]
+        chunk = next(streaming.iter_pandas_chunks(file_path, read_columns, 1, use_columnar_cache, cache_format))
+        sorted_chunk = schema.add_stock_name_pandas(chunk, file_path).sort_values(SORT_KEY, kind="stable")
+        write_run(pa.Table.from_pandas(sorted_chunk[operations.SELECTED_COLUMNS], preserve_index=False), output_path)
+        return
+    warmup_query = loaders.scan_file(file_path, use_columnar_cache, cache_format).head(1).select(operations.SELECTED_COLUMNS).sort(SORT_KEY)
+    warmup_query.sink_ipc(output_path, engine="streaming")
+
+
+# Runs in a worker process, one per repeat: sorts the tier's files once into an IPC file in a scratch
+# directory that is removed afterwards. After a one-row warm-up the process's virtual memory is capped
+# at the budget above what it maps by then, the same way for both engines, and no repeat inherits
+# the allocator reservations of another. Returns the time in nanoseconds, the sort's counts, the
+# memory stats and the output size
+def sort_tier_capped(engine, tier_files, memory_budget_bytes, fan_in=None, spill_dir=None, **loader_options):
+    sort_files = external_sort_pandas if engine == "Pandas" else external_sort_polars
+    scratch_dir = tempfile.mkdtemp(prefix="external-sort-", dir=spill_dir)
+    output_path = os.path.join(scratch_dir, "sorted.arrow")
+    run_dir = tempfile.mkdtemp(dir=scratch_dir)
+    try:
+        warm_up_sort(engine, tier_files[0], output_path, **loader_options)
+        with memory.PeakRSSSampler() as sampler:
+            isolation.limit_address_space(memory_budget_bytes, above_current=True)
+            start_ns = time.perf_counter_ns()
+            sort_stats = sort_files(tier_files, output_path, memory_budget_bytes, run_dir, fan_in, **loader_options)
+            elapsed_ns = time.perf_counter_ns() - start_ns
+        return {"elapsed_ns": elapsed_ns, "sort_stats": sort_stats, "memory": sampler.stats(), "output_bytes": os.path.getsize(output_path)}
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+# Function to measure the external sort of one tier's files for one engine: every warm-up and timed
+# repeat sorts in its own capped worker process (sort_tier_capped). The record keeps each memory
+# figure's largest value over the repeats, the one the budget had to hold.
+# Returns ("ok", record), or the status and payload of the first repeat that failed, as call_isolated
+def measure_sort_tier(engine, tier_files, tier_rows, size_limit_gb, memory_budget_bytes, fan_in=None, warmup=0, repeats=1,
+                      spill_dir=None, **loader_options):
+    samples_ns = []
+    memory_stats = {}
+    for repeat_index in range(warmup + max(repeats, 1)):
+        status, payload = isolation.call_isolated(sort_tier_capped, (engine, tier_files, memory_budget_bytes, fan_in, spill_dir), loader_options)
+        if status != "ok":
+            return status, payload
+        if repeat_index < warmup:
+            continue
+        samples_ns.append(payload["elapsed_ns"])
+        for key, value in payload["memory"].items():
+            memory_stats[key] = value if memory_stats.get(key) is None else max(memory_stats[key], value or 0)
+        sort_stats, output_bytes = payload["sort_stats"], payload["output_bytes"]
+
+    record = {"engine": engine, "size_tier_gb": size_limit_gb, "status": "ok", "mode": "external_sort", "cache": "warm",
+              "operation": "External Sort", "rows": tier_rows, "memory_budget_bytes": memory_budget_bytes}
+    record.update(timing.summarize(samples_ns))
+    record.update(memory_stats)
+    record.update({
+        "rows_per_s": tier_rows / max(record["time_s"], 1e-9),
+        "output_bytes": output_bytes,
+        "spill_bytes": sort_stats["spill_bytes"],
+        "merge_passes": sort_stats["merge_passes"],
+        "runs": sort_stats["runs"],
+    })
+    progress.report("operation", operation="External Sort", time_s=record["time_s"])
+    return "ok", record
+
+
+# Function to measure the external sort of every size tier for one engine, each tier sorted from the
+# files on disk. Both engines are held to the budget by the same RLIMIT_AS cap (see sort_tier_capped):
+# pandas sizes its runs and merges to fit, Polars has no such setting and relies on its streaming
+# engine. The first tier that does not fit stops the larger ones.
+# Yields the tier size and its one "External Sort" record
+def measure_external_sort(engine, file_paths, size_tiers_gb, memory_budget_gb=DEFAULT_MEMORY_BUDGET_GB, fan_in=None,
+                          warmup=0, repeats=1, spill_dir=None, **loader_options):
+    memory_budget_bytes = int(memory_budget_gb * (1024 ** 3))
+    tier_files = []
+    tier_rows = 0
+    for size_limit_gb, new_entries in loaders.split_into_tiers(file_paths, size_tiers_gb):
+        tier_files = tier_files + [entry["path"] for entry in new_entries]
+        tier_rows += sum(entry["rows"] for entry in new_entries)
+        if not tier_files:
+            continue
+        status, payload = measure_sort_tier(engine, tier_files, tier_rows, size_limit_gb, memory_budget_bytes, fan_in, warmup, repeats,
+                                            spill_dir, **loader_options)
+        if status == "ok":
+            yield size_limit_gb, [payload]
+            continue
+        if status == "oom":
+            message = f"OOM at {size_limit_gb} GB within a {memory_budget_gb} GB budget"
+        elif status == "crashed":
+            message = f"Worker exited with code {payload} at {size_limit_gb} GB"
+        else:
+            message = payload
+        yield size_limit_gb, [{"engine": engine, "size_tier_gb": size_limit_gb, "status": status if status == "oom" else "error",
+                               "mode": "external_sort", "operation": "External Sort", "message": message}]
+        return
+
+
+# Function to run the external sort for every engine and size tier and return it as a run, like
+# runner.run_matrix. Only the columnar cache options apply; the sort always reads every tier from scratch
+def run_external_sort(file_paths, size_tiers_gb, engines=runner.ENGINES, memory_budget_gb=DEFAULT_MEMORY_BUDGET_GB,
+                      fan_in=None, warmup=0, repeats=1, use_columnar_cache=False, cache_format="parquet", **run_options):
+    run = runner.new_run(file_paths, size_tiers_gb, engines, mode="external_sort", warmup=warmup, repeats=repeats,
+                         use_columnar_cache=use_columnar_cache, cache_format=cache_format, memory_budget_gb=memory_budget_gb, fan_in=fan_in)
+    for engine in engines:
+        for _, records in measure_external_sort(engine, file_paths, size_tiers_gb, memory_budget_gb, fan_in, warmup, repeats,
+                                                use_columnar_cache=use_columnar_cache, cache_format=cache_format):
+            run["records"].extend(records)
+    return run
+
+
+# Function to tabulate an external-sort run, one row per engine and size tier
+def external_sort_table(records):
+    rows = []
+    for record in records:
+        if record["status"] != "ok" or record["operation"] != "External Sort":
+            continue
+        rows.append({
+            "Engine": record["engine"],
+            "Data Size (GB)": f"{record['size_tier_gb']} GB",
+            "Rows": f"{record['rows']:,}",
+            "Time (s)": round(record["time_s"], 3),
+            "Throughput (M rows/s)": round(record["rows_per_s"] / 1e6, 3),
+            "Sorted Runs": record["runs"],
+            "Merge Passes": record["merge_passes"],
+            "Spilled (GB)": None if record["spill_bytes"] is None else round(record["spill_bytes"] / (1024 ** 3), 3),
+            "Peak RSS (GB)": round(record["peak_rss_bytes"] / (1024 ** 3), 3),
+        })
+    return rows
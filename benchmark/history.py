@@ -0,0 +1,112 @@
+import glob
+import hashlib
+import json
+import os
+
+import polars as pl
+
+# Every finished run is appended here as one Parquet file, partitioned by the day it started and the
+# host it ran on, e.g. benchmark_history/date=2025-01-31/host=box/run-<id>.parquet
+HISTORY_DIR = "benchmark_history"
+
+# Records are only compared with records measured the same way on the same machine
+SERIES_COLUMNS = ["host", "engine", "operation", "size_tier_gb", "mode", "cache", "threads",
+                  "setting_use_columnar_cache", "setting_cache_format", "setting_pandas_ingest", "setting_isolated",
+                  "sessions", "max_heavy_queries"]
+
+# Metrics the dashboard tracks, and which direction is worse
+METRICS = {
+    "rows_per_s": {"label": "Throughput (M rows/s)", "scale": 1e-6, "higher_is_better": True},
+    "time_s": {"label": "Median time (s)", "scale": 1, "higher_is_better": False},
+    "peak_rss_bytes": {"label": "Peak RSS (GB)", "scale": 1 / (1024 ** 3), "higher_is_better": False},
+    "peak_delta_bytes": {"label": "Peak RSS growth (GB)", "scale": 1 / (1024 ** 3), "higher_is_better": False},
+}
+
+
+# Function to identify a run by its environment and settings, so importing the same run twice is a no-op
+def run_id(run):
+    identity = json.dumps({"environment": run["environment"], "settings": run.get("settings", {})}, sort_keys=True, default=str)
+    return hashlib.sha1(identity.encode()).hexdigest()[:12]
+
+
+# Function to flatten a run into one row per record, with the environment and the scalar settings
+# repeated on every row as env_ and setting_ columns. Lists are kept as JSON text
+def history_rows(run):
+    environment = {f"env_{key}": value for key, value in run["environment"].items()}
+    settings = {
+        f"setting_{key}": json.dumps(value) if isinstance(value, (list, dict)) else value
+        for key, value in run.get("settings", {}).items()
+    }
+    current_run_id = run_id(run)
+    return [{"run_id": current_run_id, **environment, **settings, **record} for record in run["records"]]
+
+
+# Function to append a run to the history. Returns the file written, or the existing one when the run
+# is already there
+def append_run(run, history_dir=HISTORY_DIR):
+    started_at = run["environment"]["started_at"]
+    host = run["environment"]["host"].replace(os.sep, "_")
+    partition_dir = os.path.join(history_dir, f"date={started_at[:10]}", f"host={host}")
+    history_path = os.path.join(partition_dir, f"run-{run_id(run)}.parquet")
+    rows = history_rows(run)
+    if os.path.exists(history_path) or not rows:
+        return history_path
+
+    os.makedirs(partition_dir, exist_ok=True)
+    # Write to a temporary name first so a reader never sees a half-written file
+    tmp_path = f"{history_path}.tmp-{os.getpid()}"
+    pl.DataFrame(rows, infer_schema_length=None).write_parquet(tmp_path)
+    os.replace(tmp_path, history_path)
+    return history_path
+
+
+# Function to load the whole history as one frame with a started_at timestamp. Runs recorded by
+# different versions have different columns, so files are combined diagonally
+def load_history(history_dir=HISTORY_DIR):
+    history_paths = sorted(glob.glob(os.path.join(history_dir, "date=*", "host=*", "*.parquet")))
+    if not history_paths:
+        return pl.DataFrame()
+    history_df = pl.concat([pl.read_parquet(history_path, hive_partitioning=True) for history_path in history_paths], how="diagonal_relaxed")
+    for column in SERIES_COLUMNS:
+        if column not in history_df.columns:
+            history_df = history_df.with_columns(pl.lit(None).alias(column))
+    return history_df.with_columns(
+        pl.col("env_started_at").str.to_datetime(time_zone="UTC").alias("started_at"),
+        pl.col("host").cast(pl.String),
+    ).filter(pl.col("status") == "ok").sort("started_at")
+
+
+# Function to compare every series' latest run with the median of the runs before it and list the
+# metrics that moved the wrong way by more than threshold (0.1 = 10%). The library versions of
+# both sides are listed to help spot an upgrade as the cause
+def find_regressions(history_df, metric="rows_per_s", threshold=0.1, baseline_runs=5):
+    if history_df.is_empty() or metric not in history_df.columns:
+        return []
+    higher_is_better = METRICS[metric]["higher_is_better"]
+    regressions = []
+    for _, series_df in history_df.filter(pl.col(metric).is_not_null()).group_by(SERIES_COLUMNS):
+        series_df = series_df.sort("started_at")
+        if series_df.height < 2:
+            continue
+        latest = series_df.row(-1, named=True)
+        baseline_df = series_df.slice(0, series_df.height - 1).tail(baseline_runs)
+        baseline_value = baseline_df[metric].median()
+        if not baseline_value:
+            continue
+        change = (latest[metric] - baseline_value) / baseline_value
+        if (change < -threshold) if higher_is_better else (change > threshold):
+            previous = baseline_df.row(-1, named=True)
+            regressions.append({
+                "Host": latest["host"],
+                "Engine": latest["engine"],
+                "Operation": latest["operation"],
+                "Data Size (GB)": f"{latest['size_tier_gb']} GB",
+                "Mode": latest["mode"],
+                "Latest Run": latest["started_at"].strftime("%Y-%m-%d %H:%M"),
+                f"Baseline ({METRICS[metric]['label']})": round(baseline_value * METRICS[metric]["scale"], 3),
+                f"Latest ({METRICS[metric]['label']})": round(latest[metric] * METRICS[metric]["scale"], 3),
+                "Change": f"{change:+.1%}",
+                "Polars": f"{previous['env_polars_version']} -> {latest['env_polars_version']}",
+                "Pandas": f"{previous['env_pandas_version']} -> {latest['env_pandas_version']}",
+            })
+    return regressions
@@ -0,0 +1,139 @@
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+
+from benchmark import loaders
+from benchmark import memory
+from benchmark import operations
+from benchmark import progress
+from benchmark import runner
+from benchmark import timing
+
+# Each handoff, the frame it starts from ("polars", "pandas_arrow" or "pandas_numpy") and how it converts.
+# A tier concatenated from several files has one chunk per file; rechunk=False keeps them as they are
+# instead of copying them into one
+CONVERSIONS = {
+    "Polars -> pandas (Arrow-backed)": ("polars", lambda df: df.to_pandas(use_pyarrow_extension_array=True)),
+    "Polars -> pandas (NumPy)": ("polars", lambda df: df.to_pandas()),
+    "pandas (Arrow-backed) -> Polars": ("pandas_arrow", lambda df: pl.from_pandas(df, rechunk=False)),
+    "pandas (NumPy) -> Polars": ("pandas_numpy", lambda df: pl.from_pandas(df, rechunk=False)),
+}
+
+
+# Function to list the (address, size) of every buffer behind an Arrow array or chunked array,
+# including the dictionary of a dictionary-encoded one
+def arrow_buffers(array):
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+    buffers = []
+    for chunk in chunks:
+        buffers.extend((buffer.address, buffer.size) for buffer in chunk.buffers() if buffer is not None and buffer.size)
+        if pa.types.is_dictionary(chunk.type):
+            buffers.extend(arrow_buffers(chunk.dictionary))
+    return buffers
+
+
+# Function to list the buffers of every column of a Polars or pandas frame, by column name.
+# Polars frames are viewed through to_arrow, which hands out their own buffers
+def frame_buffers(df):
+    if isinstance(df, pl.DataFrame):
+        arrow_table = df.to_arrow()
+        return {column: arrow_buffers(arrow_table.column(column)) for column in df.columns}
+    column_buffers = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.ArrowDtype):
+            column_buffers[column] = arrow_buffers(series.array.__arrow_array__())
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays = [series.cat.codes.to_numpy(), series.cat.categories.to_numpy()]
+        else:
+            arrays = [series.to_numpy()]
+        column_buffers[column] = [(array.__array_interface__["data"][0], array.nbytes) for array in arrays if array.nbytes]
+    return column_buffers
+
+
+# Function to tell, column by column, how many bytes of the converted frame still live in the
+# source frame's buffers. A buffer is shared when it lies inside one of the source's buffers
+def buffer_sharing(source_df, converted_df):
+    source_ranges = [(address, address + size) for buffers in frame_buffers(source_df).values() for address, size in buffers]
+    shared_bytes = 0
+    copied_bytes = 0
+    shared_columns = []
+    for column, buffers in frame_buffers(converted_df).items():
+        column_shared = sum(size for address, size in buffers
+                            if any(start <= address and address + size <= end for start, end in source_ranges))
+        column_copied = sum(size for _, size in buffers) - column_shared
+        shared_bytes += column_shared
+        copied_bytes += column_copied
+        if column_shared and not column_copied:
+            shared_columns.append(column)
+    if not copied_bytes:
+        buffers = "shared"
+    elif not shared_bytes:
+        buffers = "copied"
+    else:
+        buffers = "partly shared"
+    return {"buffers": buffers, "shared_bytes": shared_bytes, "copied_bytes": copied_bytes, "shared_columns": shared_columns}
+
+
+# Function to measure every conversion between the Polars selected_df_final of each tier and pandas.
+# The pandas side is loaded with pyarrow-backed dtypes, and its read is recorded too; the NumPy-backed
+# frame is the Polars frame converted the classic way. Yields the tier size and its records
+def measure_interop(file_paths, size_tiers_gb, warmup=0, repeats=1, use_columnar_cache=False, cache_format="parquet", **run_options):
+    loader_options = {"use_columnar_cache": use_columnar_cache, "cache_format": cache_format}
+    polars_tiers = loaders.load_tiers("Polars", file_paths, size_tiers_gb, **loader_options)
+    pandas_tiers = loaders.load_tiers("Pandas", file_paths, size_tiers_gb, warmup, repeats, pandas_ingest="arrow", **loader_options)
+    for polars_tier, pandas_tier in zip(polars_tiers, pandas_tiers):
+        size_limit_gb, polars_df, _, _, _, _, tier_rows = polars_tier
+        _, pandas_df, pandas_read_time, _, pandas_read_sampler, _, _ = pandas_tier
+        tier_records = [{"engine": "Pandas", "size_tier_gb": size_limit_gb, "status": "ok", "mode": "interop", "cache": "warm",
+                         "operation": "Reading (Arrow-backed)", "rows": tier_rows, "time_s": pandas_read_time,
+                         "rows_per_s": tier_rows / max(pandas_read_time, 1e-9), **pandas_read_sampler.stats()}]
+        selected_df_final = polars_df.select(operations.SELECTED_COLUMNS)
+        sources = {
+            "polars": selected_df_final,
+            "pandas_arrow": pandas_df.loc[:, operations.SELECTED_COLUMNS],
+            "pandas_numpy": selected_df_final.to_pandas(),
+        }
+        for conversion, (source, convert) in CONVERSIONS.items():
+            source_df = sources[source]
+            with memory.PeakRSSSampler() as sampler:
+                samples_ns, converted_df = timing.time_repeats(lambda: convert(source_df), warmup, repeats)
+            record = {"engine": "Polars" if source == "polars" else "Pandas", "size_tier_gb": size_limit_gb, "status": "ok",
+                      "mode": "interop", "cache": "warm", "operation": conversion, "rows": tier_rows}
+            record.update(timing.summarize(samples_ns))
+            record.update(sampler.stats())
+            record["rows_per_s"] = tier_rows / max(record["time_s"], 1e-9)
+            record.update(buffer_sharing(source_df, converted_df))
+            progress.report("operation", operation=conversion, time_s=record["time_s"])
+            tier_records.append(record)
+            del converted_df
+        yield size_limit_gb, tier_records
+
+
+# Function to run the interop benchmark over the size tiers and return it as a run, like runner.run_matrix
+def run_interop(file_paths, size_tiers_gb, warmup=0, repeats=1, use_columnar_cache=False, cache_format="parquet", **run_options):
+    run = runner.new_run(file_paths, size_tiers_gb, runner.ENGINES, mode="interop", warmup=warmup, repeats=repeats,
+                         use_columnar_cache=use_columnar_cache, cache_format=cache_format, pandas_ingest="arrow")
+    for _, records in measure_interop(file_paths, size_tiers_gb, warmup, repeats, use_columnar_cache, cache_format):
+        run["records"].extend(records)
+    return run
+
+
+# Function to tabulate an interop run, one row per size tier and handoff
+def interop_table(records):
+    rows = []
+    for record in records:
+        if record["status"] != "ok" or record.get("mode") != "interop":
+            continue
+        rows.append({
+            "Data Size (GB)": f"{record['size_tier_gb']} GB",
+            "Step": record["operation"],
+            "Buffers": record.get("buffers", "-"),
+            "Shared Columns": ", ".join(record.get("shared_columns", [])) or "-",
+            "Copied (GB)": memory.bytes_to_gb(record["copied_bytes"]) if "copied_bytes" in record else None,
+            "Time (s)": round(record["time_s"], 4),
+            "Peak RSS (GB)": memory.bytes_to_gb(record["peak_rss_bytes"]),
+            "Peak RSS Growth (GB)": memory.bytes_to_gb(record["peak_delta_bytes"]),
+        })
+    return rows
@@ -0,0 +1,91 @@
+import errno
+import multiprocessing
+import resource
+import signal
+
+from benchmark import memory
+from benchmark import operations
+from benchmark import progress
+
+
+# Function to cap this process's virtual memory with RLIMIT_AS at limit_bytes, or at limit_bytes more
+# than it maps already, so the interpreter, the libraries and their thread pools are not counted
+def limit_address_space(limit_bytes, above_current=False):
+    if above_current:
+        limit_bytes += memory.current_vms_bytes() or 0
+    resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+
+
+# Runs in the worker process: applies the address-space cap, calls the function and sends its
+# result back over the pipe, preceded by the steps it reports along the way
+def _call_worker(conn, function, args, kwargs, memory_limit_gb):
+    try:
+        if memory_limit_gb:
+            limit_address_space(int(memory_limit_gb * (1024 ** 3)))
+        with progress.reporting(lambda event: conn.send(("progress", event))):
+            result = function(*args, **kwargs)
+        conn.send(("ok", result))
+    except MemoryError:
+        conn.send(("oom", None))
+    except OSError as error:
+        # Polars reports a failed allocation as an I/O error with the OS's ENOMEM code
+        out_of_memory = error.errno == errno.ENOMEM or f"os error {errno.ENOMEM})" in str(error)
+        conn.send(("oom" if out_of_memory else "error", repr(error)))
+    except RuntimeError as error:
+        # Under RLIMIT_AS the first thing to fail is often reserving a new thread's stack
+        conn.send(("oom" if "can't start new thread" in str(error) else "error", repr(error)))
+    except Exception as error:
+        conn.send(("error", repr(error)))
+    finally:
+        conn.close()
+
+
+# Function to call a module-level function in a fresh process so allocator state, cached frames and
+# crashes cannot leak into the caller, or into the Streamlit server. RLIMIT_AS caps virtual memory,
+# so leave headroom: allocators reserve more than they touch.
+# Returns ("ok", result), ("oom", None), ("crashed", exit code) or ("error", message)
+def call_isolated(function, args=(), kwargs=None, memory_limit_gb=None):
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_call_worker, args=(child_conn, function, args, kwargs or {}, memory_limit_gb))
+    process.start()
+    # Close our copy of the child's end so recv() sees EOF if the worker dies without replying
+    child_conn.close()
+    status = None
+    try:
+        status, payload = parent_conn.recv()
+        # Pass the worker's steps on to whoever listens in this process until the result arrives
+        while status == "progress":
+            progress.report(**payload)
+            status, payload = parent_conn.recv()
+    except EOFError:
+        status, payload = "crashed", None
+    finally:
+        parent_conn.close()
+        # A listener that raises, e.g. to cancel the run, must not leave the worker running
+        if process.is_alive() and status in (None, "progress"):
+            process.terminate()
+        process.join()
+
+    if status != "crashed":
+        return status, payload
+    # Rust allocators abort and the kernel OOM killer sends SIGKILL, neither comes back as MemoryError
+    if process.exitcode in (-signal.SIGKILL, -signal.SIGABRT, -signal.SIGSEGV):
+        return "oom", None
+    return "crashed", process.exitcode
+
+
+# Runs in the worker process: measures a single tier from scratch
+def _measure_tier(engine, file_paths, size_limit_gb, **loader_options):
+    return list(operations.measure_tiers(engine, file_paths, [size_limit_gb], **loader_options))
+
+
+# Function to measure one (engine, tier) pair in a fresh process, capped at memory_limit_gb.
+# Returns ("ok", [(size, records)]), ("oom", message) or ("error", message)
+def measure_tier_isolated(engine, file_paths, size_limit_gb, memory_limit_gb=None, **loader_options):
+    status, payload = call_isolated(_measure_tier, (engine, file_paths, size_limit_gb), loader_options, memory_limit_gb)
+    if status == "oom":
+        return "oom", f"OOM at {size_limit_gb} GB"
+    if status == "crashed":
+        return "error", f"Worker exited with code {payload} at {size_limit_gb} GB"
+    return status, payload
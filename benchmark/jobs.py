@@ -0,0 +1,184 @@
+import abc
+import collections
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark import history
+from benchmark import loaders
+from benchmark import progress
+from benchmark import results
+from benchmark import runner
+
+# One benchmark at a time for the whole server: runs started together would compete for the same
+# cores and memory and skew each other's numbers, so later ones wait their turn
+EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="benchmark")
+RECENT_STEPS = 8
+
+
+class JobCancelled(Exception):
+    """Raised in the job's thread at the next reported step after cancel()."""
+
+
+# Function to count the bytes a run will read: every engine reads each file once per tier it is
+# new in, and isolated runs read every tier from scratch
+def planned_bytes(file_paths, size_tiers_gb, engines=runner.ENGINES, isolated=False, **run_options):
+    tier_bytes = 0
+    total_bytes = 0
+    for _, new_entries in loaders.split_into_tiers(file_paths, size_tiers_gb):
+        new_bytes = sum(entry["size_bytes"] for entry in new_entries)
+        tier_bytes += new_bytes
+        total_bytes += tier_bytes if isolated else new_bytes
+    return total_bytes * len(engines)
+
+
+# A run in the background executor. The worker thread only puts events on a queue; poll() drains
+# them into the attributes the page draws from, so nothing is shared while it runs.
+# The finished run is saved by the worker, so it is kept even if nobody is watching any more
+class BackgroundJob(abc.ABC):
+    def __init__(self):
+        self.run = None
+        self.status = "queued"
+        self.recent_steps = collections.deque(maxlen=RECENT_STEPS)
+        self.saved_path = None
+        self.error = None
+        self._events = queue.Queue()
+        self._cancel_requested = threading.Event()
+        self._future = None
+
+    def start(self):
+        self._future = EXECUTOR.submit(self._work)
+        return self
+
+    def cancel(self):
+        self._cancel_requested.set()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "cancelled", "error")
+
+    # Runs in the executor thread
+    def _report(self, event):
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+        self._events.put(event)
+
+    # Runs in the executor thread: does the work and returns the finished run
+    @abc.abstractmethod
+    def _execute(self):
+        pass
+
+    # Runs in the executor thread
+    def _work(self):
+        self._events.put({"step": "started"})
+        try:
+            with progress.reporting(self._report):
+                if self._cancel_requested.is_set():
+                    raise JobCancelled()
+                finished_run = self._execute()
+        except JobCancelled:
+            self._events.put({"step": "cancelled"})
+            return
+        except Exception as error:
+            self._events.put({"step": "error", "message": repr(error)})
+            return
+        saved_path = results.write_results(finished_run, results.default_output_path())
+        history.append_run(finished_run)
+        self._events.put({"step": "done", "saved_path": saved_path, "run": finished_run})
+
+    # Function to apply one event to the attributes. Steps a job does not know are listed as they come
+    def _apply(self, event):
+        step = event["step"]
+        if step == "started":
+            self.status = "running"
+        elif step == "file":
+            self.recent_steps.append(f"{event['engine']}: read {event['path']} ({event['size_bytes'] / (1024 ** 3):.2f} GB)")
+        elif step == "operation":
+            self.recent_steps.append(f"{event['operation']}: {event['time_s']:.3f} s")
+        elif step == "done":
+            self.status = "done"
+            self.saved_path = event["saved_path"]
+            self.run = event["run"]
+        elif step == "cancelled":
+            self.status = "cancelled"
+        elif step == "error":
+            self.status = "error"
+            self.error = event["message"]
+        else:
+            self.recent_steps.append(f"{step}: " + ", ".join(f"{key} {value}" for key, value in event.items() if key != "step"))
+
+    # Function to apply the events that arrived since the last call. Call it from the page
+    def poll(self):
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                return self
+            self._apply(event)
+
+
+# The main benchmark: the engine x size tier x operation matrix, with progress in bytes read and
+# each tier's records shown as soon as it is done
+class BenchmarkJob(BackgroundJob):
+    def __init__(self, file_paths, size_tiers_gb, engines=runner.ENGINES, **run_options):
+        super().__init__()
+        self.file_paths = list(file_paths)
+        self.size_tiers_gb = list(size_tiers_gb)
+        self.engines = list(engines)
+        self.run_options = run_options
+        self.run = runner.new_run(self.file_paths, self.size_tiers_gb, self.engines, **run_options)
+        self.total_bytes = planned_bytes(self.file_paths, self.size_tiers_gb, self.engines, **run_options)
+        self.bytes_done = 0
+        self._files_read = set()
+
+    @property
+    def progress_fraction(self):
+        if self.status == "done":
+            return 1.0
+        return min(self.bytes_done / self.total_bytes, 1.0) if self.total_bytes else 0.0
+
+    # Runs in the executor thread
+    def _execute(self):
+        records = []
+        for engine, size_limit_gb, tier_records in runner.iter_matrix(self.file_paths, self.size_tiers_gb, self.engines, **self.run_options):
+            records.extend(tier_records)
+            self._events.put({"step": "tier", "engine": engine, "size_tier_gb": size_limit_gb, "records": tier_records})
+        return dict(self.run, records=records)
+
+    def _apply(self, event):
+        step = event["step"]
+        if step == "file":
+            # Repeats read the same file again; progress counts each file once per engine and tier
+            file_key = (event["engine"], event["size_tier_gb"], event["path"])
+            if file_key not in self._files_read:
+                self._files_read.add(file_key)
+                self.bytes_done += event["size_bytes"]
+        elif step == "tier":
+            self.run["records"].extend(event["records"])
+            self.recent_steps.append(f"{event['engine']}: {event['size_tier_gb']} GB tier done")
+            return
+        elif step == "done":
+            # The records arrived tier by tier; keep them rather than the finished copy
+            self.status = "done"
+            self.saved_path = event["saved_path"]
+            return
+        super()._apply(event)
+
+
+# Any other benchmark: a function that returns a finished run, like interop.run_interop
+class RunJob(BackgroundJob):
+    def __init__(self, run_function, args, kwargs):
+        super().__init__()
+        self.run_function = run_function
+        self.args = args
+        self.kwargs = kwargs
+
+    # Runs in the executor thread
+    def _execute(self):
+        return self.run_function(*self.args, **self.kwargs)
+
+
+# Function to run a benchmark function in the background executor, after whatever is already queued.
+# Returns its job
+def submit(run_function, *args, **kwargs):
+    return RunJob(run_function, args, kwargs).start()
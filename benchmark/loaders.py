@@ -0,0 +1,176 @@
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import polars as pl
+
+from benchmark import columnar_cache
+from benchmark import manifest
+from benchmark import memory
+from benchmark import progress
+from benchmark import schema
+from benchmark import timing
+
+PANDAS_INGEST_MODES = ["chunked", "parallel", "arrow"]
+
+
+# Function to calculate file size in GB
+def get_file_size_in_gb(file_path):
+    return os.path.getsize(file_path) / (1024 ** 3)  # Convert bytes to GB
+
+
+# Function to split the files into size tiers using the sizes recorded in the manifest. Each tier
+# lists the manifest entries of only the files that did not fit in the previous tier, taking files
+# in order until the next one would exceed the tier's limit
+def split_into_tiers(file_paths, size_limits_gb):
+    entries = manifest.build_manifest(file_paths)
+    total_size_gb = 0
+    entry_index = 0
+    tiers = []
+    for size_limit_gb in size_limits_gb:
+        new_entries = []
+        while entry_index < len(entries):
+            file_size_gb = entries[entry_index]["size_bytes"] / (1024 ** 3)
+            if total_size_gb + file_size_gb > size_limit_gb:
+                break
+            total_size_gb += file_size_gb
+            new_entries.append(entries[entry_index])
+            entry_index += 1
+        tiers.append((size_limit_gb, new_entries))
+    return tiers
+
+
+# Function to scan a CSV or Parquet file lazily with the declared schema, keeping only the given
+# columns so the rest are never parsed, plus the categorical Stock_Name taken from the file name.
+# Parquet files are already columnar, so they are scanned directly rather than through the cache
+def scan_file(file_path, use_columnar_cache=False, cache_format="parquet", columns=schema.BENCHMARK_COLUMNS):
+    if use_columnar_cache and not schema.is_parquet(file_path):
+        lazy_df = columnar_cache.scan_cached(file_path, cache_format)
+    else:
+        lazy_df = schema.scan_polars(file_path)
+    return schema.with_stock_name_polars(lazy_df.select(columns), file_path)
+
+
+# Function to scan several files into one lazy frame. Pandas-only loader options are ignored
+def scan_files(file_paths, use_columnar_cache=False, cache_format="parquet", **pandas_options):
+    return pl.concat([scan_file(file_path, use_columnar_cache, cache_format) for file_path in file_paths])
+
+
+# Function to read a file into pandas with the same schema and columns as scan_file
+def read_file_pandas(file_path, use_columnar_cache=False, cache_format="parquet", columns=schema.BENCHMARK_COLUMNS):
+    chunk_size = 5000
+
+    if schema.is_parquet(file_path):
+        # Columnar files are read whole, there is no parse cost to spread over chunks
+        df_chunks = [schema.read_parquet_pandas(file_path, columns)]
+    elif use_columnar_cache:
+        df_chunks = [columnar_cache.read_cached_pandas(file_path, cache_format, columns)]
+    else:
+        df_chunks = pd.read_csv(file_path, chunksize=chunk_size, **schema.pandas_read_options(columns))
+
+    return [schema.add_stock_name_pandas(chunks, file_path) for chunks in df_chunks]
+
+
+# Function to read a whole file into pandas with the pyarrow parser and the declared schema.
+# Runs inside the parallel ingest workers. dtype_backend="pyarrow" keeps the columns as Arrow arrays
+def read_whole_file_pandas(file_path, use_columnar_cache=False, cache_format="parquet", columns=schema.BENCHMARK_COLUMNS, dtype_backend=None):
+    if schema.is_parquet(file_path):
+        df = schema.read_parquet_pandas(file_path, columns, dtype_backend)
+    elif use_columnar_cache:
+        df = columnar_cache.read_cached_pandas(file_path, cache_format, columns, dtype_backend)
+    else:
+        df = pd.read_csv(file_path, engine="pyarrow", **schema.pandas_read_options(columns, dtype_backend))
+    return schema.add_stock_name_pandas(df, file_path, dtype_backend)
+
+
+# Function to read several files into a list of pandas frames. "chunked" is the original serial
+# reader; "parallel" reads whole files concurrently in a process pool. The pool is started for
+# each read, so its startup cost is part of what the parallel ingest is timed at. "arrow" reads
+# whole files into pyarrow-backed dtypes in this process, since sending them back from a pool
+# would copy the Arrow buffers the mode is meant to keep; the pyarrow parser is multithreaded itself.
+# on_file_read, when given, is called with each file's path once that file has been read
+def read_files_pandas(file_paths, use_columnar_cache=False, cache_format="parquet", pandas_ingest="chunked", ingest_workers=None,
+                      on_file_read=None):
+    def file_read(file_path):
+        if on_file_read is not None:
+            on_file_read(file_path)
+
+    dfs = []
+    if pandas_ingest in ("chunked", "arrow") or len(file_paths) < 2:
+        # A single file is not worth starting a pool for
+        for file_path in file_paths:
+            if pandas_ingest == "chunked":
+                dfs.extend(read_file_pandas(file_path, use_columnar_cache, cache_format))
+            else:
+                dtype_backend = "pyarrow" if pandas_ingest == "arrow" else None
+                dfs.append(read_whole_file_pandas(file_path, use_columnar_cache, cache_format, dtype_backend=dtype_backend))
+            file_read(file_path)
+        return dfs
+
+    max_workers = min(ingest_workers or os.cpu_count() or 1, len(file_paths))
+    # spawn rather than fork: the Streamlit server and the RSS sampler run threads
+    context = multiprocessing.get_context("spawn")
+    read_file = functools.partial(read_whole_file_pandas, use_columnar_cache=use_columnar_cache, cache_format=cache_format)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        # Results come back in file order, each as soon as it and the files before it are read
+        for file_path, df in zip(file_paths, pool.map(read_file, file_paths)):
+            dfs.append(df)
+            file_read(file_path)
+    return dfs
+
+
+# Function to load files tier by tier for one engine ("Polars" or "Pandas"). Each tier only reads
+# its new files and appends them to the previous tier's frame, so no file is parsed twice; the
+# append is part of the timed read. Yields the cumulative reading time (what the tier would cost
+# to read from scratch), the incremental timing summary (what this tier actually added), the
+# tier's full file list and its row count from the manifest.
+# With cold_cache the tier's files are dropped from the page cache before every timed repeat
+def load_tiers(engine, file_paths, size_limits_gb, warmup=0, repeats=1, cold_cache=False, **loader_options):
+    tier_df = None
+    cumulative_time = 0
+    tier_files = []
+    tier_rows = 0
+    for size_limit_gb, new_entries in split_into_tiers(file_paths, size_limits_gb):
+        previous_df = tier_df
+        new_files = [entry["path"] for entry in new_entries]
+        tier_files = tier_files + new_files
+        tier_rows += sum(entry["rows"] for entry in new_entries)
+
+        new_sizes = {entry["path"]: entry["size_bytes"] for entry in new_entries}
+
+        # Progress is reported once a file has been read, so it follows the bytes actually processed
+        def report_file_read(file_path):
+            progress.report("file", engine=engine, size_tier_gb=size_limit_gb, path=file_path, size_bytes=new_sizes[file_path])
+
+        def read_new_files():
+            for entry in new_entries:
+                print(f"Reading file: {entry['path']} with {engine}, Size: {entry['size_bytes'] / (1024 ** 3):.2f} GB")
+            if not new_files:
+                return previous_df
+            if engine == "Polars":
+                # One collect reads every new file, so they are all reported when it finishes
+                new_df = scan_files(new_files, **loader_options).collect()
+                for file_path in new_files:
+                    report_file_read(file_path)
+                # rechunk=False keeps the previous tier's chunks as they are instead of copying them
+                return new_df if previous_df is None else pl.concat([previous_df, new_df], rechunk=False)
+            return schema.concat_pandas([previous_df] + read_files_pandas(new_files, on_file_read=report_file_read, **loader_options))
+
+        def drop_new_files():
+            drop_from_page_cache(new_files, **loader_options)
+
+        with memory.PeakRSSSampler() as load_sampler:
+            samples_ns, tier_df = timing.time_repeats(read_new_files, warmup, repeats, drop_new_files if cold_cache else None)
+        incremental_timing = timing.summarize(samples_ns)
+        cumulative_time += incremental_timing["time_s"]
+        yield size_limit_gb, tier_df, cumulative_time, incremental_timing, load_sampler, tier_files, tier_rows
+
+
+# Function to drop the files a read touches from the page cache, including their cached copies
+def drop_from_page_cache(file_paths, use_columnar_cache=False, cache_format="parquet", **pandas_options):
+    read_paths = list(file_paths)
+    if use_columnar_cache:
+        read_paths += [columnar_cache.cache_file_path(file_path, cache_format) for file_path in file_paths]
+    timing.drop_page_cache(read_paths)
@@ -0,0 +1,193 @@
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import polars as pl
+
+from benchmark import admission
+from benchmark import columnar_cache
+from benchmark import history
+from benchmark import loaders
+from benchmark import manifest
+from benchmark import memory
+from benchmark import operations
+from benchmark import results
+from benchmark import runner
+from benchmark import schema
+from benchmark import streaming
+
+COMBINED_FILE = "combined_data3gb.csv"
+SESSION_COUNTS = [1, 2, 4, 8]
+PERCENTILES = [50, 95, 99]
+
+
+# Runs in a session thread: the Lazy Execution page's Polars query on the combined file
+def lazy_execution_polars(target):
+    lazy_df = columnar_cache.scan_cached(target["combined_path"]) if target["use_columnar_cache"] else pl.scan_csv(target["combined_path"], schema_overrides=schema.POLARS_SCHEMA)
+    return operations.company_summary_stages(lazy_df)["sort"].collect(engine=target["engine"])
+
+
+# Runs in a session thread: the Lazy Execution page's chunked pandas workflow on the combined file
+def lazy_execution_pandas(target):
+    return streaming.aggregate_pandas_chunked(target["combined_path"], use_columnar_cache=target["use_columnar_cache"])[0]
+
+
+# Runs in a session thread: every Speed page operation as a lazy query over the archive files
+def speed_page_operations(target):
+    lazy_df = loaders.scan_files(target["file_paths"], target["use_columnar_cache"])
+    return [lazy_query.collect(engine=target["engine"]) for lazy_query in operations.lazy_queries(lazy_df, target["context"]).values()]
+
+
+# Each workload is one heavy query a session sends: the engine it measures and what it runs
+WORKLOADS = {
+    "lazy_polars": ("Polars", "Lazy Execution: Polars query", lazy_execution_polars),
+    "lazy_pandas": ("Pandas", "Lazy Execution: chunked pandas", lazy_execution_pandas),
+    "speed_operations": ("Polars", "Speed page: all operations", speed_page_operations),
+}
+
+
+# Runs in a session thread: send queries_per_session queries one after the other, the way a user
+# waits for each page to render before the next, and record each latency including the queued time
+def run_session(workload, target, queries_per_session, gate, start_barrier, latencies, waits, errors):
+    _, _, run_query = WORKLOADS[workload]
+    start_barrier.wait()
+    for _ in range(queries_per_session):
+        start_time = time.perf_counter()
+        try:
+            with gate.admit() as admitted:
+                run_query(target)
+        except Exception as error:
+            errors.append(repr(error))
+            continue
+        latencies.append(time.perf_counter() - start_time)
+        waits.append(admitted["wait_s"])
+
+
+# Function to run sessions concurrent sessions of a workload in threads of this process, as the
+# Streamlit server does, all starting together. With max_heavy_queries only that many queries run at
+# once and the rest queue. Returns one record with latency percentiles, throughput and peak memory
+def measure_sessions(workload, target, sessions, queries_per_session=3, max_heavy_queries=None):
+    engine, operation, _ = WORKLOADS[workload]
+    gate = admission.AdmissionGate(max_heavy_queries)
+    latencies, waits, errors = [], [], []
+    start_barrier = threading.Barrier(sessions + 1)
+    threads = [
+        threading.Thread(target=run_session, args=(workload, target, queries_per_session, gate, start_barrier, latencies, waits, errors),
+                         name=f"session-{index}")
+        for index in range(sessions)
+    ]
+    with memory.PeakRSSSampler() as sampler:
+        for thread in threads:
+            thread.start()
+        start_barrier.wait()
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed_time = time.perf_counter() - start_time
+
+    record = {"engine": engine, "size_tier_gb": target["size_tier_gb"], "mode": "load_test", "cache": "warm", "operation": operation,
+              "sessions": sessions, "max_heavy_queries": max_heavy_queries or 0, "queries": len(latencies), "errors": len(errors)}
+    if not latencies:
+        return dict(record, status="error", message=errors[0] if errors else "No queries ran")
+    record.update({f"p{percentile}_s": float(np.percentile(latencies, percentile)) for percentile in PERCENTILES})
+    record.update({
+        "status": "ok",
+        # The median latency is what the history and its regression checks track as time_s
+        "time_s": record["p50_s"],
+        "max_s": max(latencies),
+        "mean_wait_s": float(np.mean(waits)),
+        "peak_queued": gate.peak_queued,
+        "wall_time_s": elapsed_time,
+        "queries_per_s": len(latencies) / elapsed_time,
+    })
+    record.update(sampler.stats())
+    return record
+
+
+# Function to describe what the workloads run against: the combined file, the archive files and the
+# Speed page's operation context. The size tier is the data one query reads
+def load_target(workload, combined_path=COMBINED_FILE, file_paths=(), engine="streaming", use_columnar_cache=False):
+    target = {"combined_path": combined_path, "file_paths": list(file_paths), "engine": engine, "use_columnar_cache": use_columnar_cache}
+    if workload == "speed_operations":
+        target["context"] = operations.operation_context(target["file_paths"])
+        size_bytes = sum(entry["size_bytes"] for entry in manifest.build_manifest(target["file_paths"]))
+    else:
+        size_bytes = os.path.getsize(combined_path)
+    target["size_tier_gb"] = memory.bytes_to_gb(size_bytes)
+    return target
+
+
+# Function to run the load test for every session count and admission limit and return it as a run,
+# like runner.run_matrix
+def run_load_test(workload, session_counts=SESSION_COUNTS, max_heavy_queries=(0,), queries_per_session=3, **target_options):
+    target = load_target(workload, **target_options)
+    engine = WORKLOADS[workload][0]
+    run = runner.new_run(target["file_paths"], [target["size_tier_gb"]], [engine], mode="load_test", workload=workload,
+                         session_counts=list(session_counts), max_heavy_queries=list(max_heavy_queries),
+                         queries_per_session=queries_per_session, engine=target["engine"], use_columnar_cache=target["use_columnar_cache"])
+    for limit in max_heavy_queries:
+        for sessions in session_counts:
+            record = measure_sessions(workload, target, sessions, queries_per_session, limit)
+            print(f"{sessions} sessions, admission limit {limit or 'none'}: " + (
+                f"p50 {record['p50_s']:.2f} s, p95 {record['p95_s']:.2f} s, {record['queries_per_s']:.2f} queries/s, "
+                f"peak RSS {memory.bytes_to_gb(record['peak_rss_bytes'])} GB" if record["status"] == "ok" else record["message"]))
+            run["records"].append(record)
+    return run
+
+
+# Function to tabulate a load-test run, one row per admission limit and session count
+def load_test_table(records):
+    rows = []
+    for record in records:
+        if record["status"] != "ok" or record.get("mode") != "load_test":
+            continue
+        rows.append({
+            "Query": record["operation"],
+            "Sessions": record["sessions"],
+            "Admission Limit": str(record["max_heavy_queries"]) if record["max_heavy_queries"] else "none",
+            **{f"p{percentile} (s)": round(record[f"p{percentile}_s"], 3) for percentile in PERCENTILES},
+            "Mean Queued (s)": round(record["mean_wait_s"], 3),
+            "Queries/s": round(record["queries_per_s"], 2),
+            "Peak RSS (GB)": memory.bytes_to_gb(record["peak_rss_bytes"]),
+        })
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark.loadtest",
+        description="Drive concurrent sessions against the pages' queries without a browser, to size hosts and check tail latency",
+    )
+    parser.add_argument("--workload", choices=list(WORKLOADS), default="lazy_polars",
+                        help="lazy_polars / lazy_pandas: the Lazy Execution page's query on the combined file; "
+                             "speed_operations: every Speed page operation on the archive files (default: %(default)s)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=SESSION_COUNTS, help="Concurrent session counts to run (default: 1 2 4 8)")
+    parser.add_argument("--queries-per-session", type=int, default=3, help="Queries each session sends, one after the other (default: %(default)s)")
+    parser.add_argument("--max-heavy-queries", type=int, nargs="+", default=[0],
+                        help="Admission limits to compare: queries run at once, the rest queue; 0 for no limit (default: 0)")
+    parser.add_argument("--combined-file", default=COMBINED_FILE, help="File the Lazy Execution workloads read (default: %(default)s)")
+    parser.add_argument("--data-glob", default="archive/*.csv", help="Files the speed_operations workload reads (default: %(default)s)")
+    parser.add_argument("--engine", choices=["streaming", "in-memory"], default="streaming", help="Polars engine (default: %(default)s)")
+    parser.add_argument("--columnar-cache", action="store_true", help="Read through the Parquet columnar cache instead of raw CSV")
+    parser.add_argument("--output", help="Results file, .json or .csv (default: benchmark_results/run-<timestamp>.json)")
+    parser.add_argument("--no-history", action="store_true", help=f"Do not append the run to the results history in {history.HISTORY_DIR}/")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    file_paths = manifest.discover(args.data_glob) if args.workload == "speed_operations" else []
+    if args.workload == "speed_operations" and not file_paths:
+        raise SystemExit(f"No files match {args.data_glob}")
+    run = run_load_test(args.workload, args.sessions, args.max_heavy_queries, args.queries_per_session, combined_path=args.combined_file,
+                        file_paths=file_paths, engine=args.engine, use_columnar_cache=args.columnar_cache)
+    output_path = results.write_results(run, args.output or results.default_output_path())
+    if not args.no_history:
+        history.append_run(run)
+    print(f"Wrote {len(run['records'])} results to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import glob
+import hashlib
+import json
+import os
+
+import polars as pl
+
+from benchmark import schema
+
+# Each directory of data files has its own manifest next to them, e.g. archive/manifest.json, shared
+# by every page, run and worker process
+MANIFEST_NAME = "manifest.json"
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+# Function to list the files matching a glob in a fixed order. Filesystem order differs between
+# machines, so the files are sorted by path and the same files always land in the same tier
+def discover(data_glob):
+    return sorted(glob.glob(data_glob))
+
+
+# Function to hash a file's content in blocks, so large files are never held in memory
+def content_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Function to describe one CSV or Parquet file: size, row count, date range and content hash. Reads
+# the whole file once, only the date column is parsed
+def describe_file(file_path):
+    stat = os.stat(file_path)
+    summary = (
+        schema.scan_polars(file_path)
+        .select(pl.len().alias("rows"), pl.col("date").min().alias("min_date"), pl.col("date").max().alias("max_date"))
+        .collect(engine="streaming")
+        .row(0, named=True)
+    )
+    return {
+        "path": file_path,
+        "size_bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": summary["rows"],
+        "min_date": summary["min_date"].isoformat() if summary["min_date"] is not None else None,
+        "max_date": summary["max_date"].isoformat() if summary["max_date"] is not None else None,
+        "sha256": content_hash(file_path),
+    }
+
+
+# Function to get the path of the manifest that describes a file: the one in the file's directory
+def manifest_path_for(file_path):
+    return os.path.join(os.path.dirname(os.path.normpath(file_path)), MANIFEST_NAME)
+
+
+# Function to read a saved manifest as a dict of path -> entry
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path) as manifest_file:
+            return {entry["path"]: entry for entry in json.load(manifest_file)["files"]}
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return {}
+
+
+# Function to get the manifest entries of the files, in the order given, each from the manifest of
+# its directory. Entries are reused while a file's size and mtime are unchanged; new or changed files
+# are described and their manifests are saved
+def build_manifest(file_paths):
+    saved_manifests = {}
+    changed_paths = set()
+    entries = []
+    for file_path in file_paths:
+        file_path = os.path.normpath(file_path)
+        manifest_path = manifest_path_for(file_path)
+        if manifest_path not in saved_manifests:
+            saved_manifests[manifest_path] = load_manifest(manifest_path)
+        saved_entries = saved_manifests[manifest_path]
+        stat = os.stat(file_path)
+        entry = saved_entries.get(file_path)
+        if entry is None or entry["size_bytes"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = describe_file(file_path)
+            saved_entries[file_path] = entry
+            changed_paths.add(manifest_path)
+        entries.append(entry)
+
+    for manifest_path in changed_paths:
+        # Write to a temporary name first so a reader never sees a half-written manifest
+        tmp_path = f"{manifest_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as manifest_file:
+            json.dump({"files": sorted(saved_manifests[manifest_path].values(), key=lambda entry: entry["path"])}, manifest_file, indent=2)
+        os.replace(tmp_path, manifest_path)
+    return entries
+
+
+# Function to count the rows of the files from their manifests
+def total_rows(file_paths):
+    return sum(entry["rows"] for entry in build_manifest(file_paths))
@@ -0,0 +1,94 @@
+import os
+import resource
+import sys
+import threading
+
+import pandas as pd
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# Function to read the current resident set size of this process in bytes
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # No /proc (e.g. macOS): fall back to the high-water mark, which is the best we can get
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+# Function to read the virtual memory this process maps in bytes, or None without /proc
+def current_vms_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * PAGE_SIZE
+    except OSError:
+        return None
+
+
+# Function to convert bytes to GB for display
+def bytes_to_gb(size_bytes, digits=3):
+    return round(size_bytes / (1024 ** 3), digits)
+
+
+# Function to get the logical size of a frame: what its data takes, independent of the allocator.
+# Pandas needs deep=True to count the Python string objects behind object columns
+def logical_size_bytes(df):
+    if isinstance(df, pd.DataFrame):
+        return int(df.memory_usage(deep=True).sum())
+    return int(df.estimated_size())
+
+
+# Samples process RSS in a background thread while the wrapped block runs, e.g.
+#     with PeakRSSSampler() as sampler:
+#         lazy_df.collect()
+#     sampler.peak_delta_bytes
+# Records the RSS at entry (baseline), the highest sample (peak) and the RSS at exit (steady state).
+# Code that holds the GIL for long stretches can delay samples, so a sample is also taken at exit
+class PeakRSSSampler:
+    def __init__(self, interval_s=0.01):
+        self.interval_s = interval_s
+        self.baseline_bytes = 0
+        self.peak_bytes = 0
+        self.steady_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval_s):
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+    def __enter__(self):
+        self.baseline_bytes = current_rss_bytes()
+        self.peak_bytes = self.baseline_bytes
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.steady_bytes = current_rss_bytes()
+        self.peak_bytes = max(self.peak_bytes, self.steady_bytes)
+        return False
+
+    # Peak growth over the RSS the process already had when the block started
+    @property
+    def peak_delta_bytes(self):
+        return self.peak_bytes - self.baseline_bytes
+
+    # Memory the block kept after it finished, e.g. the loaded frame
+    @property
+    def steady_delta_bytes(self):
+        return self.steady_bytes - self.baseline_bytes
+
+    # Function to get the samples as a record, in bytes
+    def stats(self):
+        return {
+            "peak_rss_bytes": self.peak_bytes,
+            "peak_delta_bytes": self.peak_delta_bytes,
+            "steady_delta_bytes": self.steady_delta_bytes,
+        }
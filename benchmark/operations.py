@@ -0,0 +1,264 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from benchmark import loaders
+from benchmark import manifest
+from benchmark import memory
+from benchmark import progress
+from benchmark import schema
+from benchmark import timing
+
+OPERATIONS = [
+    "Group By & Aggregation", "Search", "Sorting", "Rolling Mean", "Join (Company Dimension)", "As-of Join",
+    "Multi-key Group By", "Distinct Count", "Top-k per Group",
+]
+SELECTED_COLUMNS = ["Stock_Name", "date", "close", "volume"]
+ROLLING_WINDOW = 20
+TOP_K = 5
+SECTORS = ["Energy", "IT", "Financials", "Consumer", "Industrials", "Healthcare", "Materials"]
+
+# What each measurement mode includes in the timed region
+MODES = {
+    "eager": "Eager vs eager: each timed region runs one operation on a frame that is already in memory "
+             "and materializes the full result. Reading is timed on its own.",
+    "end_to_end": "Lazy end-to-end vs read+compute: each timed region starts from the files on disk. Polars runs "
+                  "one lazy query from scan to collected result, so projection and predicate pushdown apply; "
+                  "pandas reads the tier's files and then computes. Reading alone is still shown for reference.",
+}
+
+
+# Function to time one operation under an RSS sampler and return its record.
+# before_each runs untimed before every timed repeat, e.g. to drop the page cache for cold runs
+def _measure(operation, run, warmup=0, repeats=1, before_each=None):
+    with memory.PeakRSSSampler() as sampler:
+        samples_ns, _ = timing.time_repeats(run, warmup, repeats, before_each)
+    record = {"operation": operation}
+    record.update(timing.summarize(samples_ns))
+    record.update(sampler.stats())
+    progress.report("operation", operation=operation, time_s=record["time_s"])
+    return record
+
+
+# Function to build the small tables the joins run against, from the files alone so lazy queries
+# can use them before any data is read: a company dimension (one row per company in the files) and
+# a daily market calendar covering the files' date range from the manifest
+def operation_context(file_paths):
+    companies = sorted({schema.company_name(file_path) for file_path in file_paths})
+    company_df = pl.DataFrame({
+        "Stock_Name": companies,
+        "sector": [SECTORS[index % len(SECTORS)] for index in range(len(companies))],
+        "lot_size": [25 * (1 + index % 8) for index in range(len(companies))],
+    }).with_columns(pl.col("Stock_Name").cast(pl.Categorical))
+
+    entries = manifest.build_manifest(file_paths)
+    dates = [entry[key] for entry in entries for key in ("min_date", "max_date") if entry[key]]
+    first_day = datetime.datetime.fromisoformat(min(dates)).replace(hour=0, minute=0, second=0) if dates else datetime.datetime(2015, 1, 1)
+    last_day = datetime.datetime.fromisoformat(max(dates)) if dates else first_day
+    calendar_dates = pl.datetime_range(first_day, last_day, "1d", time_unit="us", eager=True)
+    # A deterministic random walk, so every run joins against the same values
+    market_level = 8000 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(calendar_dates))))
+    calendar_df = pl.DataFrame({"date": calendar_dates, "market_level": np.round(market_level, 2)})
+    return {"companies": company_df, "calendar": calendar_df}
+
+
+# Function to get a context table in the same form as the frame it is joined to
+def _like(df, other_df):
+    return other_df.lazy() if isinstance(df, pl.LazyFrame) else other_df
+
+
+# Polars operations. Each takes a selected frame, eager or lazy, and the operation context; on a
+# DataFrame it computes the result, on a LazyFrame it builds the query
+POLARS_OPERATIONS = {
+    "Group By & Aggregation": lambda df, context: df.group_by("date").agg(pl.sum("volume").alias("Total Volume")),
+    "Search": lambda df, context: df.filter(pl.col("volume") > 1000),
+    "Sorting": lambda df, context: df.sort("date"),
+    "Rolling Mean": lambda df, context: df.sort("Stock_Name", "date").with_columns(
+        pl.col("close").rolling_mean(ROLLING_WINDOW).over("Stock_Name").alias("rolling_close")),
+    "Join (Company Dimension)": lambda df, context: df.join(_like(df, context["companies"]), on="Stock_Name", how="left"),
+    "As-of Join": lambda df, context: df.sort("date").join_asof(_like(df, context["calendar"]), on="date"),
+    "Multi-key Group By": lambda df, context: df.group_by("Stock_Name", pl.col("date").dt.truncate("1d").alias("day")).agg(
+        pl.sum("volume").alias("total_volume"),
+        pl.mean("close").alias("average_close"),
+        pl.min("close").alias("low_close"),
+        pl.max("close").alias("high_close"),
+        pl.len().alias("bars"),
+    ),
+    "Distinct Count": lambda df, context: df.group_by("Stock_Name").agg(pl.col("close").n_unique().alias("distinct_close")),
+    "Top-k per Group": lambda df, context: df.filter(
+        pl.col("volume").rank("ordinal", descending=True).over("Stock_Name") <= TOP_K),
+}
+
+
+# Function to run an as-of join in pandas. merge_asof needs both keys in the same datetime unit,
+# and the pyarrow and C parsers produce different ones
+def _pandas_asof_join(df, context):
+    calendar_df = context["calendar"].to_pandas()
+    calendar_df["date"] = calendar_df["date"].astype(df["date"].dtype)
+    return pd.merge_asof(df.sort_values("date"), calendar_df, on="date")
+
+
+# Function to keep the TOP_K highest-volume bars of every company in pandas
+def _pandas_top_k(df, context):
+    return df.sort_values("volume", ascending=False).groupby("Stock_Name", observed=True).head(TOP_K)
+
+
+# Function to add the per-company rolling mean of close in pandas
+def _pandas_rolling_mean(df, context):
+    sorted_df = df.sort_values(["Stock_Name", "date"], ignore_index=True)
+    rolling_close = sorted_df.groupby("Stock_Name", observed=True)["close"].rolling(ROLLING_WINDOW).mean()
+    return sorted_df.assign(rolling_close=rolling_close.reset_index(level=0, drop=True))
+
+
+# pandas versions of POLARS_OPERATIONS. Each returns a new, fully computed frame or series
+PANDAS_OPERATIONS = {
+    "Group By & Aggregation": lambda df, context: df.groupby("date")["volume"].sum(),
+    "Search": lambda df, context: df[df["volume"] > 1000],
+    "Sorting": lambda df, context: df.sort_values("date"),
+    "Rolling Mean": _pandas_rolling_mean,
+    "Join (Company Dimension)": lambda df, context: df.merge(context["companies"].to_pandas(), on="Stock_Name", how="left"),
+    "As-of Join": _pandas_asof_join,
+    "Multi-key Group By": lambda df, context: df.groupby(["Stock_Name", df["date"].dt.floor("D").rename("day")], observed=True).agg(
+        total_volume=("volume", "sum"),
+        average_close=("close", "mean"),
+        low_close=("close", "min"),
+        high_close=("close", "max"),
+        bars=("close", "size"),
+    ),
+    "Distinct Count": lambda df, context: df.groupby("Stock_Name", observed=True)["close"].nunique(),
+    "Top-k per Group": _pandas_top_k,
+}
+
+
+# Steps of the Lazy Execution page's query on the combined file, each applied to the previous one's
+# output: filter close > 50, total volume and mean close per company, sorted by company
+COMPANY_SUMMARY_COLUMNS = ["company", "close", "volume"]
+COMPANY_SUMMARY_STEPS = [
+    ("filter", lambda lazy_df: lazy_df.filter(pl.col("close") > 50)),
+    ("group_by + agg", lambda lazy_df: lazy_df.group_by("company").agg([
+        pl.col("volume").sum().alias("total_volume"),
+        pl.col("close").mean().alias("average_close"),
+    ])),
+    ("sort", lambda lazy_df: lazy_df.sort("company")),
+]
+
+
+# Function to build the Lazy Execution page's query stage by stage, keyed by step name. The last
+# stage is the query
+def company_summary_stages(lazy_df):
+    stages = {}
+    for step_name, step in COMPANY_SUMMARY_STEPS:
+        lazy_df = step(lazy_df)
+        stages[step_name] = lazy_df
+    return stages
+
+
+# Function to build the lazy queries for each operation
+def lazy_queries(lazy_df, context):
+    # Focus only on the columns the operations use
+    selected_df = lazy_df.select(SELECTED_COLUMNS)
+    return {operation: build(selected_df, context) for operation, build in POLARS_OPERATIONS.items()}
+
+
+# Function to measure time and memory for lazy queries, end to end from the scan to the result
+def measure_operations_lazy(lazy_df, context, warmup=0, repeats=1, before_each=None):
+    return [
+        _measure(operation, query.collect, warmup, repeats, before_each)
+        for operation, query in lazy_queries(lazy_df, context).items()
+    ]
+
+
+# Function to measure time and memory for operations on a Polars DataFrame already in memory
+def measure_operations_eager(df, context, warmup=0, repeats=1):
+    # Focus only on the columns the operations use
+    selected_df = df.select(SELECTED_COLUMNS)
+
+    return [
+        _measure(operation, lambda run=run: run(selected_df, context), warmup, repeats)
+        for operation, run in POLARS_OPERATIONS.items()
+    ]
+
+
+# Function to measure time and memory for operations on a pandas DataFrame already in memory.
+# Each operation returns a new, fully computed frame or series
+def measure_operations_pandas(df, context, warmup=0, repeats=1):
+    # Focus only on the columns the operations use
+    selected_df = df.loc[:, SELECTED_COLUMNS]
+
+    return [
+        _measure(operation, lambda run=run: run(selected_df, context), warmup, repeats)
+        for operation, run in PANDAS_OPERATIONS.items()
+    ]
+
+
+# Function to measure time and memory for pandas read+compute: every timed region reads the files
+# again before running the operation
+def measure_operations_pandas_end_to_end(read_df, context, warmup=0, repeats=1, before_each=None):
+    def selected_df():
+        return read_df().loc[:, SELECTED_COLUMNS]
+
+    return [
+        _measure(operation, lambda run=run: run(selected_df(), context), warmup, repeats, before_each)
+        for operation, run in PANDAS_OPERATIONS.items()
+    ]
+
+
+# Function to keep only the columns the operations work on, as the size figures always have
+def select_measured_columns(df):
+    if isinstance(df, pd.DataFrame):
+        return df.loc[:, SELECTED_COLUMNS]
+    return df.select(SELECTED_COLUMNS)
+
+
+# Function to measure the operations of one tier in the chosen mode
+def measure_tier_operations(engine, mode, tier_df, tier_files, warmup=0, repeats=1, cold_cache=False, **loader_options):
+    context = operation_context(tier_files)
+    if mode == "eager":
+        if engine == "Polars":
+            return measure_operations_eager(tier_df, context, warmup, repeats)
+        return measure_operations_pandas(tier_df, context, warmup, repeats)
+
+    def drop_tier_files():
+        loaders.drop_from_page_cache(tier_files, **loader_options)
+
+    before_each = drop_tier_files if cold_cache else None
+    if engine == "Polars":
+        return measure_operations_lazy(loaders.scan_files(tier_files, **loader_options), context, warmup, repeats, before_each)
+
+    def read_df():
+        return schema.concat_pandas(loaders.read_files_pandas(tier_files, **loader_options))
+
+    return measure_operations_pandas_end_to_end(read_df, context, warmup, repeats, before_each)
+
+
+# Function to load and measure every size tier for one engine ("Polars" or "Pandas").
+# Yields the tier size and its records: one "Reading" record followed by one record per operation.
+# Every record carries the tier's row count and the rows processed per second
+def measure_tiers(engine, file_paths, size_tiers_gb, mode="eager", warmup=0, repeats=1, cold_cache=False, **loader_options):
+    tiers = loaders.load_tiers(engine, file_paths, size_tiers_gb, warmup, repeats, cold_cache, **loader_options)
+    for size_limit_gb, tier_df, reading_time, incremental_timing, load_sampler, tier_files, tier_rows in tiers:
+        if tier_df is None:
+            continue
+        operation_records = measure_tier_operations(engine, mode, tier_df, tier_files, warmup, repeats, cold_cache, **loader_options)
+
+        # Every reading statistic describes the incremental read, so time_s sits between min_s and p95_s;
+        # cumulative_time_s is what the whole tier would cost to read from scratch, and the reading
+        # throughput is the tier's rows over it.
+        # memory_usage(deep=True) counts the string objects behind pandas object columns
+        reading_record = {"operation": "Reading"}
+        reading_record.update(incremental_timing)
+        reading_record.update({
+            "cumulative_time_s": reading_time,
+            "rows_per_s": tier_rows / max(reading_time, 1e-9),
+            "logical_size_bytes": memory.logical_size_bytes(select_measured_columns(tier_df)),
+        })
+        reading_record.update(load_sampler.stats())
+
+        records = []
+        for record in [reading_record] + operation_records:
+            records.append({"engine": engine, "size_tier_gb": size_limit_gb, "status": "ok", "mode": mode,
+                            "cache": "cold" if cold_cache else "warm", "rows": tier_rows,
+                            "rows_per_s": tier_rows / max(record["time_s"], 1e-9), **record})
+        yield size_limit_gb, records
@@ -0,0 +1,264 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+import polars as pl
+import pyarrow.parquet as pq
+
+from benchmark import loaders
+from benchmark import manifest
+from benchmark import memory
+from benchmark import operations
+from benchmark import progress
+from benchmark import runner
+from benchmark import schema
+from benchmark import timing
+
+# Partitioned copies live next to the app, one per source directory, e.g.
+# .partitioned/archive/company=TCS/year=2015/TCS.parquet
+PARTITIONED_DIR = ".partitioned"
+DATASET_INFO = "_dataset.json"
+# About two months of NSE minute bars, so a one-month query can skip most of a year's row groups
+ROW_GROUP_ROWS = 16_384
+
+
+# Function to get the directory of the partitioned copy of a set of files
+def dataset_dir(file_paths, partitioned_dir=PARTITIONED_DIR):
+    source_dir = os.path.dirname(os.path.normpath(file_paths[0])) or "."
+    return os.path.join(partitioned_dir, os.path.basename(os.path.abspath(source_dir)))
+
+
+# Function to identify what a dataset was built from: the source files' hashes from the manifest,
+# the schema version and the row group size
+def dataset_key(file_paths, row_group_rows=ROW_GROUP_ROWS):
+    sources = [[entry["path"], entry["sha256"]] for entry in manifest.build_manifest(file_paths)]
+    identity = json.dumps({"sources": sources, "schema_version": schema.SCHEMA_VERSION, "row_group_rows": row_group_rows})
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+# Function to rewrite the files as a Hive-partitioned Parquet dataset, company=<name>/year=<year>/,
+# with each file sorted by date and written in row groups of row_group_rows with min/max statistics.
+# The dataset is only rebuilt when the files change. Returns the dataset directory and the build time
+def build_dataset(file_paths, partitioned_dir=PARTITIONED_DIR, row_group_rows=ROW_GROUP_ROWS):
+    output_dir = dataset_dir(file_paths, partitioned_dir)
+    key = dataset_key(file_paths, row_group_rows)
+    info_path = os.path.join(output_dir, DATASET_INFO)
+    if os.path.exists(info_path):
+        with open(info_path) as info_file:
+            if json.load(info_file)["key"] == key:
+                return output_dir, 0.0
+
+    start_time = datetime.datetime.now()
+    # Build next to the old copy and swap it in, so a reader never sees a half-written dataset
+    tmp_dir = f"{output_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for file_path in file_paths:
+        company = schema.company_name(file_path)
+        file_df = loaders.scan_file(file_path).drop("Stock_Name").with_columns(pl.col("date").dt.year().alias("year")).collect()
+        for (year,), year_df in file_df.group_by("year"):
+            partition_dir = os.path.join(tmp_dir, f"company={company}", f"year={year}")
+            os.makedirs(partition_dir, exist_ok=True)
+            part_path = os.path.join(partition_dir, os.path.basename(file_path).rsplit(".", 1)[0] + ".parquet")
+            year_df.drop("year").sort("date").write_parquet(part_path, statistics=True, row_group_size=row_group_rows)
+        progress.report("partition", path=file_path)
+    with open(os.path.join(tmp_dir, DATASET_INFO), "w") as info_file:
+        json.dump({"key": key, "files": len(file_paths), "row_group_rows": row_group_rows}, info_file)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(output_dir), exist_ok=True)
+    os.replace(tmp_dir, output_dir)
+    return output_dir, (datetime.datetime.now() - start_time).total_seconds()
+
+
+# Function to pick selective queries that match the data, from the dates in the manifest: one company
+# over its last month and its last year, every company on the last day, and the Search benchmark's
+# volume filter. Each query is a company (or None), a date range [start, end) and a minimum volume
+def selective_queries(file_paths):
+    entries = manifest.build_manifest(file_paths)
+    company = schema.company_name(entries[0]["path"])
+    company_last = max(datetime.datetime.fromisoformat(entry["max_date"]) for entry in entries
+                       if schema.company_name(entry["path"]) == company)
+    last_date = max(datetime.datetime.fromisoformat(entry["max_date"]) for entry in entries)
+    first_date = min(datetime.datetime.fromisoformat(entry["min_date"]) for entry in entries)
+    month_start = company_last.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_end = (month_start + datetime.timedelta(days=32)).replace(day=1)
+    last_day = last_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        f"{company}, one month": {"company": company, "start": month_start, "end": month_end, "min_volume": None},
+        f"{company}, one year": {"company": company, "start": month_start.replace(month=1), "end": month_start.replace(year=month_start.year + 1, month=1), "min_volume": None},
+        "All companies, one day": {"company": None, "start": last_day, "end": last_day + datetime.timedelta(days=1), "min_volume": None},
+        "Search (volume > 1000)": {"company": None, "start": first_date, "end": last_date + datetime.timedelta(days=1), "min_volume": 1000},
+    }
+
+
+# Function to build the Polars filter of a query on the selected columns
+def query_filter(query):
+    predicate = pl.col("date").is_between(query["start"], query["end"], closed="left")
+    if query["company"] is not None:
+        predicate = predicate & (pl.col("Stock_Name").cast(pl.String) == query["company"])
+    if query["min_volume"] is not None:
+        predicate = predicate & (pl.col("volume") > query["min_volume"])
+    return predicate
+
+
+# Function to scan the whole partitioned dataset, with the partition columns read from the paths
+def scan_dataset(output_dir):
+    return pl.scan_parquet(os.path.join(output_dir, "**", "*.parquet"), hive_partitioning=True)
+
+
+# Function to scan the partitioned dataset for a query. The company and year filters prune whole
+# partitions; the date and volume filters skip row groups by their statistics
+def scan_pruned(output_dir, query):
+    lazy_df = scan_dataset(output_dir)
+    partition_filter = pl.col("year").is_between(query["start"].year, (query["end"] - datetime.timedelta(microseconds=1)).year)
+    if query["company"] is not None:
+        partition_filter = partition_filter & (pl.col("company") == query["company"])
+    return (
+        lazy_df.filter(partition_filter)
+        .with_columns(pl.col("company").cast(pl.Categorical).alias("Stock_Name"))
+        .select(operations.SELECTED_COLUMNS)
+        .filter(query_filter(query))
+    )
+
+
+# Function to run a query over the whole partitioned dataset in Polars, with predicate and projection
+# pushdown turned off: every partition and row group is read, then filtered
+def scan_full(output_dir, query):
+    lazy_df = (
+        scan_dataset(output_dir)
+        .with_columns(pl.col("company").cast(pl.Categorical).alias("Stock_Name"))
+        .select(operations.SELECTED_COLUMNS)
+        .filter(query_filter(query))
+    )
+    return lazy_df.collect(optimizations=pl.QueryOptFlags(predicate_pushdown=False, projection_pushdown=False))
+
+
+# Function to read a query from the partitioned dataset into pandas through pyarrow, which prunes the
+# same partitions and row groups
+def read_pruned_pandas(output_dir, query):
+    last_year = (query["end"] - datetime.timedelta(microseconds=1)).year
+    filters = [("year", ">=", query["start"].year), ("year", "<=", last_year), ("date", ">=", query["start"]), ("date", "<", query["end"])]
+    if query["company"] is not None:
+        filters.append(("company", "==", query["company"]))
+    if query["min_volume"] is not None:
+        filters.append(("volume", ">", query["min_volume"]))
+    df = pd.read_parquet(output_dir, columns=["company", "date", "close", "volume"], filters=filters)
+    df["Stock_Name"] = df.pop("company").astype("category")
+    return df.loc[:, operations.SELECTED_COLUMNS]
+
+
+# Function to work out what a pruned scan reads: the partitions the company and year keep, and
+# within them the row groups whose date and volume statistics can hold matching rows. Bytes are the
+# compressed size of the selected columns in the row groups read
+def pruning_stats(output_dir, query):
+    last_year = (query["end"] - datetime.timedelta(microseconds=1)).year
+    stats = {"files_total": 0, "files_skipped": 0, "row_groups_total": 0, "row_groups_skipped": 0, "bytes_total": 0, "bytes_read": 0}
+    for root, _, file_names in os.walk(output_dir):
+        partition = dict(part.split("=", 1) for part in os.path.relpath(root, output_dir).split(os.sep) if "=" in part)
+        for file_name in file_names:
+            if not file_name.endswith(".parquet"):
+                continue
+            metadata = pq.ParquetFile(os.path.join(root, file_name)).metadata
+            partition_kept = (query["start"].year <= int(partition["year"]) <= last_year
+                              and query["company"] in (None, partition["company"]))
+            stats["files_total"] += 1
+            stats["files_skipped"] += not partition_kept
+            for row_group_index in range(metadata.num_row_groups):
+                row_group = metadata.row_group(row_group_index)
+                columns = {row_group.column(index).path_in_schema: row_group.column(index) for index in range(row_group.num_columns)}
+                row_group_bytes = sum(columns[column].total_compressed_size for column in schema.BENCHMARK_COLUMNS)
+                date_stats = columns["date"].statistics
+                volume_stats = columns["volume"].statistics
+                row_group_kept = (
+                    partition_kept
+                    and date_stats.max >= query["start"] and date_stats.min < query["end"]
+                    and (query["min_volume"] is None or volume_stats.max > query["min_volume"])
+                )
+                stats["row_groups_total"] += 1
+                stats["row_groups_skipped"] += not row_group_kept
+                stats["bytes_total"] += row_group_bytes
+                stats["bytes_read"] += row_group_bytes if row_group_kept else 0
+    return stats
+
+
+# Function to run a query over the whole partitioned dataset in pandas: every partition and row group
+# is read through pyarrow without filters, then filtered
+def full_scan_pandas(output_dir, query):
+    df = pd.read_parquet(output_dir, columns=["company", "date", "close", "volume"])
+    df["Stock_Name"] = df.pop("company").astype("category")
+    mask = (df["date"] >= query["start"]) & (df["date"] < query["end"])
+    if query["company"] is not None:
+        mask &= df["Stock_Name"] == query["company"]
+    if query["min_volume"] is not None:
+        mask &= df["volume"] > query["min_volume"]
+    return df.loc[mask, operations.SELECTED_COLUMNS]
+
+
+# Function to time every selective query over the partitioned dataset, in Polars and pandas, as a
+# full scan and as a pruned scan. Both read the same Parquet files, so the difference is the pruning
+# alone: the full scan reads every row group, the pruned scan what pruning_stats works out.
+# Yields the query name and its records
+def measure_selective_queries(file_paths, engines=runner.ENGINES, warmup=0, repeats=1, cold_cache=False, **run_options):
+    output_dir, build_time = build_dataset(file_paths)
+    dataset_files = [os.path.join(root, file_name) for root, _, file_names in os.walk(output_dir)
+                     for file_name in file_names if file_name.endswith(".parquet")]
+    source_bytes = sum(entry["size_bytes"] for entry in manifest.build_manifest(file_paths))
+    size_tier_gb = memory.bytes_to_gb(source_bytes)
+
+    for query_name, query in selective_queries(file_paths).items():
+        pruning = pruning_stats(output_dir, query)
+        scans = {
+            ("Polars", "full scan"): lambda: scan_full(output_dir, query),
+            ("Polars", "pruned scan"): lambda: scan_pruned(output_dir, query).collect(),
+            ("Pandas", "full scan"): lambda: full_scan_pandas(output_dir, query),
+            ("Pandas", "pruned scan"): lambda: read_pruned_pandas(output_dir, query),
+        }
+        tier_records = []
+        for (engine, scan), run_scan in scans.items():
+            if engine not in engines:
+                continue
+            with memory.PeakRSSSampler() as sampler:
+                samples_ns, result_df = timing.time_repeats(run_scan, warmup, repeats,
+                                                            (lambda: timing.drop_page_cache(dataset_files)) if cold_cache else None)
+            record = {"engine": engine, "size_tier_gb": size_tier_gb, "status": "ok", "mode": "partitioned",
+                      "cache": "cold" if cold_cache else "warm", "operation": f"{query_name}: {scan}", "rows": len(result_df)}
+            record.update(timing.summarize(samples_ns))
+            record.update(sampler.stats())
+            if scan == "pruned scan":
+                record.update(pruning)
+            else:
+                record.update(pruning, files_skipped=0, row_groups_skipped=0, bytes_read=pruning["bytes_total"])
+            record["dataset_build_s"] = build_time
+            progress.report("operation", operation=record["operation"], time_s=record["time_s"])
+            tier_records.append(record)
+        yield query_name, tier_records
+
+
+# Function to run the selective queries and return them as a run, like runner.run_matrix
+def run_selective_queries(file_paths, engines=runner.ENGINES, **run_options):
+    run = runner.new_run(file_paths, [], engines, **dict(run_options, mode="partitioned"))
+    for _, records in measure_selective_queries(file_paths, engines, **run_options):
+        run["records"].extend(records)
+    return run
+
+
+# Function to tabulate a selective-query run, the full and pruned scans of each query side by side
+def selective_query_table(records):
+    rows = []
+    for record in records:
+        if record["status"] != "ok" or record.get("mode") != "partitioned":
+            continue
+        rows.append({
+            "Engine": record["engine"],
+            "Query": record["operation"],
+            "Rows": f"{record['rows']:,}",
+            "Time (s)": round(record["time_s"], 4),
+            "Read (GB)": memory.bytes_to_gb(record["bytes_read"]),
+            "Of (GB)": memory.bytes_to_gb(record["bytes_total"]),
+            "Row Groups Skipped": f"{record['row_groups_skipped']} of {record['row_groups_total']}" if "row_groups_total" in record else "-",
+            "Partitions Skipped": f"{record['files_skipped']} of {record['files_total']}" if "files_total" in record else "-",
+            "Peak RSS (GB)": memory.bytes_to_gb(record["peak_rss_bytes"]),
+        })
+    return rows
@@ -0,0 +1,60 @@
+import re
+import time
+
+import polars as pl
+
+
+# Function to get the logical plan of a query, before or after the optimizer ran
+def plan_text(lazy_df, optimized=True):
+    return lazy_df.explain(optimized=optimized)
+
+
+# Function to list what the optimizer pushed into each scan: how many columns are read
+# (projection pushdown) and which filter is applied while reading (predicate pushdown)
+def pushdown_summary(lazy_df):
+    summary = []
+    for line in plan_text(lazy_df).splitlines():
+        line = line.strip()
+        if line.endswith(" SCAN") or " SCAN [" in line:
+            summary.append({"Scan": line, "Columns Read": "all", "Filter Applied While Reading": "none"})
+        elif summary and line.startswith("PROJECT"):
+            match = re.search(r"PROJECT (\S+) COLUMNS", line)
+            summary[-1]["Columns Read"] = match.group(1) if match else line
+        elif summary and line.startswith("SELECTION:"):
+            summary[-1]["Filter Applied While Reading"] = line[len("SELECTION:"):].strip()
+    return summary
+
+
+# Function to collect a query, returning the result and the time it took in microseconds
+def collect_timed(lazy_df):
+    start_time = time.perf_counter()
+    df = lazy_df.collect()
+    return df, int((time.perf_counter() - start_time) * 1e6)
+
+
+# Function to time a query stage by stage. The first stage is its source, already collected and timed
+# by collect_timed so several queries can share it; each step, a function of a lazy frame, then runs
+# on the previous stage's materialized output, so a stage's time is its own work only. Materializing
+# between stages gives up the fusion the whole query gets, so the stages add up to more than the
+# query takes. Times are in microseconds
+def profile_stages(source_name, source_df, source_us, steps):
+    timings = [{"node": source_name, "time_us": source_us}]
+    stage_df = source_df
+    for step_name, step in steps:
+        stage_df, step_us = collect_timed(step(stage_df.lazy()))
+        timings.append({"node": step_name, "time_us": step_us})
+    return timings
+
+
+# Function to get per-node timings (in microseconds) for a query. LazyFrame.profile() times every
+# node of the physical plan, with its start and end, where this Polars version has it; otherwise
+# time_stages, a function returning profile_stages' timings, is called, or the query is timed as a
+# whole. Returns the timings and a label saying which method was used
+def profile_query(lazy_df, time_stages=None):
+    if hasattr(pl.LazyFrame, "profile"):
+        _, timings_df = lazy_df.profile()
+        return timings_df.to_dicts(), "LazyFrame.profile() per-node timings"
+    if time_stages is None:
+        _, query_us = collect_timed(lazy_df)
+        return [{"node": "query", "time_us": query_us}], "Whole query time (this Polars version has no LazyFrame.profile())"
+    return time_stages(), "Time per stage, each run on the previous stage's materialized output (this Polars version has no LazyFrame.profile())"
@@ -0,0 +1,25 @@
+import contextlib
+import threading
+
+# Each thread reports to its own callback, so runs in different threads never see each other's steps
+_local = threading.local()
+
+
+# Context manager to send the steps reported in this thread to callback, e.g. to feed a UI queue.
+# The callback may raise to stop the run at that step
+@contextlib.contextmanager
+def reporting(callback):
+    previous_callback = getattr(_local, "callback", None)
+    _local.callback = callback
+    try:
+        yield
+    finally:
+        _local.callback = previous_callback
+
+
+# Function to report a step of a run, e.g. "file" or "operation", with its details. Does nothing
+# when nobody is listening
+def report(step, **details):
+    callback = getattr(_local, "callback", None)
+    if callback is not None:
+        callback({"step": step, **details})
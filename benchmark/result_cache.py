@@ -0,0 +1,120 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+
+import polars as pl
+
+CACHE_DIR = ".result_cache"
+
+
+# Function to identify a file's current contents by path, size and mtime
+def file_fingerprint(file_path):
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+# Function to build a cache key from the input files' fingerprints and a description of the query,
+# e.g. a lazy query's unoptimized plan
+def cache_key(file_paths, query):
+    key_parts = [file_fingerprint(file_path) for file_path in file_paths] + [query]
+    return hashlib.sha1("\n".join(key_parts).encode()).hexdigest()
+
+
+# Two-tier cache for small query results: an in-memory LRU in front of Arrow IPC files on disk,
+# each tier evicting its least recently used entries once it goes over its size budget.
+# Entries are (Polars DataFrame, metadata dict). Safe to share between Streamlit sessions: only
+# one session computes a given key while the others wait for its result
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, memory_budget_bytes=256 * 1024 ** 2, disk_budget_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self._memory = collections.OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = collections.defaultdict(threading.Lock)
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, f"{key}.arrow"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, df, metadata):
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[0].estimated_size()
+            self._memory[key] = (df, metadata)
+            self._memory_bytes += df.estimated_size()
+            while self._memory_bytes > self.memory_budget_bytes and len(self._memory) > 1:
+                _, (evicted_df, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_df.estimated_size()
+
+    def _evict_disk(self):
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".arrow"):
+                file_path = os.path.join(self.cache_dir, file_name)
+                stat = os.stat(file_path)
+                entries.append((stat.st_mtime, stat.st_size, file_path))
+        total_bytes = sum(size for _, size, _ in entries)
+        # Disk hits touch their file, so the oldest mtime is the least recently used entry
+        for _, size, file_path in sorted(entries):
+            if total_bytes <= self.disk_budget_bytes:
+                break
+            os.remove(file_path)
+            os.remove(file_path[:-len(".arrow")] + ".json")
+            total_bytes -= size
+
+    # Function to look a key up, memory first then disk. Returns (df, metadata, tier) or None
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                df, metadata = self._memory[key]
+                return df, metadata, "memory"
+        data_path, metadata_path = self._paths(key)
+        try:
+            # Read the bytes up front rather than memory-mapping, so eviction can delete the file safely
+            with open(data_path, "rb") as data_file:
+                df = pl.read_ipc(data_file.read())
+            with open(metadata_path) as metadata_file:
+                metadata = json.load(metadata_file)
+            os.utime(data_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        self._remember(key, df, metadata)
+        return df, metadata, "disk"
+
+    def put(self, key, df, metadata=None):
+        metadata = metadata or {}
+        self._remember(key, df, metadata)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, metadata_path = self._paths(key)
+        # Metadata goes in first: a data file without its metadata is treated as a miss
+        with open(metadata_path, "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+        df.write_ipc(f"{data_path}.tmp")
+        os.replace(f"{data_path}.tmp", data_path)
+        self._evict_disk()
+
+    # Function to return a cached result or compute and cache it. compute returns (df, metadata).
+    # Returns (df, metadata, tier) where tier is "memory", "disk" or "computed"
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            key_lock = self._key_locks[key]
+        with key_lock:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            df, metadata = compute()
+            self.put(key, df, metadata)
+            return df, metadata, "computed"
+
+    # Function to drop every cached result, in memory and on disk
+    def invalidate(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if os.path.isdir(self.cache_dir):
+            for file_name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, file_name))
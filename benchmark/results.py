@@ -0,0 +1,142 @@
+import csv
+import datetime
+import json
+import os
+import platform
+import socket
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from benchmark import memory
+
+RESULTS_DIR = "benchmark_results"
+
+
+# Function to describe the machine and libraries a run was measured on
+def environment_metadata():
+    try:
+        usable_cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        usable_cpus = os.cpu_count()
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    return {
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "python_version": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "usable_cpu_count": usable_cpus,
+        "polars_version": pl.__version__,
+        "polars_thread_pool_size": pl.thread_pool_size(),
+        "polars_max_threads_env": os.environ.get("POLARS_MAX_THREADS"),
+        "pandas_version": pd.__version__,
+        "numpy_version": np.__version__,
+        "pyarrow_version": pyarrow_version,
+    }
+
+
+# Function to write a run to JSON (environment + records) or CSV (one row per record, environment
+# repeated on every row), picked by the file extension
+def write_results(run, output_path):
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if output_path.endswith(".csv"):
+        rows = [{**{f"env_{key}": value for key, value in run["environment"].items()}, **record} for record in run["records"]]
+        field_names = []
+        for row in rows:
+            field_names += [key for key in row if key not in field_names]
+        with open(output_path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=field_names)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(output_path, "w") as json_file:
+            json.dump(run, json_file, indent=2)
+    return output_path
+
+
+# Function to read a run written by write_results
+def read_results(input_path):
+    if input_path.endswith(".csv"):
+        rows = pd.read_csv(input_path).to_dict("records")
+        environment = {key[len("env_"):]: value for key, value in rows[0].items() if key.startswith("env_")} if rows else {}
+        records = [{key: value for key, value in row.items() if not key.startswith("env_")} for row in rows]
+        return {"environment": environment, "records": records}
+    with open(input_path) as json_file:
+        return json.load(json_file)
+
+
+# Function to build the default output path for a run
+def default_output_path(extension="json"):
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(RESULTS_DIR, f"run-{timestamp}.{extension}")
+
+
+# Function to format a timing with its spread: the median and its 95% bootstrap interval
+def format_timing(time_s, ci_low_s, ci_high_s):
+    if ci_low_s == ci_high_s:
+        return f"{time_s:.3f}"
+    return f"{time_s:.3f} [{ci_low_s:.3f}-{ci_high_s:.3f}]"
+
+
+# Function to pivot one engine's records into the timing table shown on the Speed page.
+# Operations show the median with its 95% interval; reading shows the cumulative median next to the incremental one
+def timing_table(records, engine):
+    rows = {}
+    for record in records:
+        if record["engine"] != engine or record["status"] != "ok":
+            continue
+        row = rows.setdefault(record["size_tier_gb"], {"Data Size (GB)": f"{record['size_tier_gb']} GB"})
+        if record["operation"] == "Reading":
+            row["Rows"] = f"{record['rows']:,}"
+            row["Reading Time (s)"] = round(record["cumulative_time_s"], 3)
+            row["Incremental Reading Time (s)"] = format_timing(record["time_s"], record["ci_low_s"], record["ci_high_s"])
+            row["Reading Throughput (M rows/s)"] = round(record["rows_per_s"] / 1e6, 2)
+        else:
+            row[f"{record['operation']} Time (s)"] = format_timing(record["time_s"], record["ci_low_s"], record["ci_high_s"])
+    return list(rows.values())
+
+
+# Function to list the full spread of every timing for one engine
+def spread_table(records, engine):
+    rows = []
+    for record in records:
+        if record["engine"] != engine or record["status"] != "ok":
+            continue
+        is_reading = record["operation"] == "Reading"
+        rows.append({
+            "Data Size (GB)": f"{record['size_tier_gb']} GB",
+            "Operation": "Reading (incremental)" if is_reading else record["operation"],
+            "Cache": record["cache"],
+            "Repeats": record["repeats"],
+            "Min (s)": round(record["min_s"], 4),
+            "Median (s)": round(record["time_s"], 4),
+            "P95 (s)": round(record["p95_s"], 4),
+            "95% CI (s)": f"{record['ci_low_s']:.4f}-{record['ci_high_s']:.4f}",
+        })
+    return rows
+
+
+# Function to pivot one engine's records into the memory table shown on the Speed page
+def memory_table(records, engine):
+    rows = {}
+    for record in records:
+        if record["engine"] != engine or record["status"] != "ok":
+            continue
+        row = rows.setdefault(record["size_tier_gb"], {"Data Size (GB)": f"{record['size_tier_gb']} GB"})
+        if record["operation"] == "Reading":
+            row["Logical Size (GB)"] = memory.bytes_to_gb(record["logical_size_bytes"])
+        row[f"{record['operation']} Peak RSS (GB)"] = memory.bytes_to_gb(record["peak_rss_bytes"])
+        row[f"{record['operation']} Peak Delta (GB)"] = memory.bytes_to_gb(record["peak_delta_bytes"])
+        row[f"{record['operation']} Steady-State Delta (GB)"] = memory.bytes_to_gb(record["steady_delta_bytes"])
+    return list(rows.values())
+
+
+# Function to list the failed tiers of one engine, e.g. "OOM at 3 GB"
+def failures(records, engine):
+    return [record["message"] for record in records if record["engine"] == engine and record["status"] != "ok"]
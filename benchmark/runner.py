@@ -0,0 +1,44 @@
+from benchmark import isolation
+from benchmark import operations
+from benchmark import results
+
+ENGINES = ["Polars", "Pandas"]
+
+
+# Function to yield (size, records) per tier for one engine. In-process runs reuse the previous
+# tier's frame; isolated runs load each tier from scratch in a fresh worker and stop at the first
+# failure, since larger tiers will not fit either
+def iter_engine(engine, file_paths, size_tiers_gb, isolated=False, memory_limit_gb=None, **loader_options):
+    if not isolated:
+        yield from operations.measure_tiers(engine, file_paths, size_tiers_gb, **loader_options)
+        return
+    for size_limit_gb in size_tiers_gb:
+        status, payload = isolation.measure_tier_isolated(engine, file_paths, size_limit_gb, memory_limit_gb, **loader_options)
+        if status != "ok":
+            yield size_limit_gb, [{"engine": engine, "size_tier_gb": size_limit_gb, "operation": None, "status": status, "message": payload}]
+            return
+        yield from payload
+
+
+# Function to yield (engine, size, records) for the whole engine x size tier x operation matrix
+def iter_matrix(file_paths, size_tiers_gb, engines=ENGINES, **run_options):
+    for engine in engines:
+        for size_limit_gb, records in iter_engine(engine, file_paths, size_tiers_gb, **run_options):
+            yield engine, size_limit_gb, records
+
+
+# Function to start an empty run document with the environment and settings it runs with
+def new_run(file_paths, size_tiers_gb, engines=ENGINES, **run_options):
+    return {
+        "environment": results.environment_metadata(),
+        "settings": {"file_count": len(file_paths), "size_tiers_gb": list(size_tiers_gb), "engines": list(engines), **run_options},
+        "records": [],
+    }
+
+
+# Function to run the whole matrix and return it with the environment it ran in
+def run_matrix(file_paths, size_tiers_gb, engines=ENGINES, **run_options):
+    run = new_run(file_paths, size_tiers_gb, engines, **run_options)
+    for _, _, records in iter_matrix(file_paths, size_tiers_gb, engines, **run_options):
+        run["records"].extend(records)
+    return run
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmark import cli
+from benchmark import results
+from benchmark import runner
+
+# Directory that contains the benchmark package, so child processes can import it from any cwd
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Function to list the thread counts to try: powers of two up to max_threads, plus max_threads itself
+def thread_counts(max_threads=None):
+    max_threads = max_threads or os.cpu_count() or 1
+    counts = []
+    threads = 1
+    while threads < max_threads:
+        counts.append(threads)
+        threads *= 2
+    counts.append(max_threads)
+    return counts
+
+
+# Function to run the benchmark CLI in a child process. The Polars thread pool is sized when polars
+# is first imported, so POLARS_MAX_THREADS only takes effect in a fresh interpreter
+def run_in_subprocess(file_paths, size_tiers_gb, engines, polars_max_threads, **run_options):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "run.json")
+        argv = [sys.executable, "-m", "benchmark", "--files", *file_paths,
+                "--tiers", *[str(tier) for tier in size_tiers_gb], "--engines", *engines,
+                "--output", output_path, "--no-history", *cli.args_from_run_options(**run_options)]
+        env = dict(os.environ, POLARS_MAX_THREADS=str(polars_max_threads))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_PARENT, env.get("PYTHONPATH")]))
+        subprocess.run(argv, env=env, check=True, stdout=subprocess.DEVNULL)
+        return results.read_results(output_path)
+
+
+# Function to run Polars at every thread count and pandas once as the single-threaded baseline.
+# Every record is tagged with the thread pool size its process actually had
+def run_thread_scaling(file_paths, size_tiers_gb, thread_counts, **run_options):
+    run = runner.new_run(file_paths, size_tiers_gb, **run_options)
+    run["settings"]["thread_counts"] = list(thread_counts)
+    engine_threads = [("Pandas", 1)] + [("Polars", threads) for threads in thread_counts]
+    for engine, threads in engine_threads:
+        child_run = run_in_subprocess(file_paths, size_tiers_gb, [engine], threads, **run_options)
+        for record in child_run["records"]:
+            record["threads"] = child_run["environment"]["polars_thread_pool_size"] if engine == "Polars" else 1
+            run["records"].append(record)
+    return run
+
+
+# Function to compute speedup and parallel efficiency per operation for one size tier.
+# Speedup is against Polars on one thread; "vs Pandas" is against single-threaded pandas. Reading is
+# compared on the whole tier's read, not on the files the tier added
+def scaling_table(records, size_tier_gb):
+    def record_time(record):
+        return record["cumulative_time_s"] if record["operation"] == "Reading" else record["time_s"]
+
+    tier_records = [record for record in records if record["status"] == "ok" and record["size_tier_gb"] == size_tier_gb]
+    pandas_times = {record["operation"]: record_time(record) for record in tier_records if record["engine"] == "Pandas"}
+    polars_records = [record for record in tier_records if record["engine"] == "Polars"]
+    single_thread_times = {record["operation"]: record_time(record) for record in polars_records if record["threads"] == 1}
+
+    rows = []
+    for record in polars_records:
+        operation, threads, time_s = record["operation"], record["threads"], record_time(record)
+        speedup = single_thread_times[operation] / time_s if operation in single_thread_times and time_s else None
+        rows.append({
+            "Operation": operation,
+            "Threads": threads,
+            "Time (s)": round(time_s, 4),
+            "Speedup": round(speedup, 2) if speedup else None,
+            "Parallel Efficiency": round(speedup / threads, 2) if speedup else None,
+            "Speedup vs Pandas": round(pandas_times[operation] / time_s, 2) if operation in pandas_times and time_s else None,
+        })
+    return rows
@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+
+# Bump when the declared types change, so columnar cache files written with the old types are replaced
+SCHEMA_VERSION = 1
+
+# Declared types of the NSE minute-bar CSVs. The per-company files have no company column; the
+# combined file carries it as "company", and the loaders add "Stock_Name" from the file name
+POLARS_SCHEMA = {
+    "date": pl.Datetime("us"),
+    "open": pl.Float64,
+    "high": pl.Float64,
+    "low": pl.Float64,
+    "close": pl.Float64,
+    "volume": pl.Float64,
+    "company": pl.Categorical,
+}
+PANDAS_DTYPES = {
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+    "company": "category",
+}
+DATE_COLUMNS = ["date"]
+# The same types as pyarrow-backed pandas dtypes, which hold Arrow buffers like Polars does, so frames
+# can be handed between the two without converting every value
+STOCK_NAME_ARROW_TYPE = pa.dictionary(pa.int32(), pa.string())
+PANDAS_ARROW_DTYPES = {
+    "date": pd.ArrowDtype(pa.timestamp("us")),
+    "open": pd.ArrowDtype(pa.float64()),
+    "high": pd.ArrowDtype(pa.float64()),
+    "low": pd.ArrowDtype(pa.float64()),
+    "close": pd.ArrowDtype(pa.float64()),
+    "volume": pd.ArrowDtype(pa.float64()),
+    "company": pd.ArrowDtype(STOCK_NAME_ARROW_TYPE),
+}
+
+# Columns the benchmark operations read from the files. Stock_Name is not among them, it comes from the file name
+BENCHMARK_COLUMNS = ["date", "close", "volume"]
+
+
+# Large companies can be split over several files named COMPANY__NNN.csv (or .parquet)
+PART_SEPARATOR = "__"
+
+
+# Function to get the company name a per-company file holds
+def company_name(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0].split(PART_SEPARATOR)[0]
+
+
+# Function to tell whether a data file is Parquet rather than CSV, from its extension
+def is_parquet(file_path):
+    return file_path.endswith(".parquet")
+
+
+# Function to scan a CSV or Parquet data file lazily with the declared types. Parquet files carry
+# their own types (the synthetic generator writes volume as integers), so they are cast to these
+def scan_polars(file_path):
+    if not is_parquet(file_path):
+        return pl.scan_csv(file_path, schema_overrides=POLARS_SCHEMA)
+    lazy_df = pl.scan_parquet(file_path)
+    file_columns = lazy_df.collect_schema().names()
+    return lazy_df.cast({column: dtype for column, dtype in POLARS_SCHEMA.items() if column in file_columns})
+
+
+# Function to cast a pandas frame read from Parquet to the declared types of its columns
+def cast_pandas(df, dtype_backend=None):
+    dtypes = PANDAS_ARROW_DTYPES if dtype_backend == "pyarrow" else PANDAS_DTYPES
+    return df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
+
+
+# Function to read a Parquet data file into pandas with the same columns and types as
+# pd.read_csv(**pandas_read_options(columns, dtype_backend))
+def read_parquet_pandas(file_path, columns=None, dtype_backend=None):
+    backend_options = {"dtype_backend": dtype_backend} if dtype_backend else {}
+    return cast_pandas(pd.read_parquet(file_path, columns=columns, **backend_options), dtype_backend)
+
+
+# Function to get the pandas read_csv options for the given columns: only those columns are
+# parsed, numbers go straight to float64 and dates are parsed to datetime64 while reading.
+# With dtype_backend="pyarrow" every column is read straight into its Arrow type instead
+def pandas_read_options(columns=None, dtype_backend=None):
+    wanted = columns if columns is not None else list(POLARS_SCHEMA)
+    if dtype_backend == "pyarrow":
+        return {
+            "usecols": columns,
+            "dtype": {column: dtype for column, dtype in PANDAS_ARROW_DTYPES.items() if column in wanted},
+            "dtype_backend": "pyarrow",
+        }
+    return {
+        "usecols": columns,
+        "dtype": {column: dtype for column, dtype in PANDAS_DTYPES.items() if column in wanted},
+        "parse_dates": [column for column in DATE_COLUMNS if column in wanted],
+    }
+
+
+# Function to add the categorical Stock_Name column to a Polars lazy frame
+def with_stock_name_polars(lazy_df, file_path):
+    return lazy_df.with_columns(pl.lit(company_name(file_path)).cast(pl.Categorical).alias("Stock_Name"))
+
+
+# Function to add the categorical Stock_Name column to a pandas frame in place. A pyarrow-backed
+# frame gets an Arrow dictionary column instead
+def add_stock_name_pandas(df, file_path, dtype_backend=None):
+    if dtype_backend == "pyarrow":
+        indices = pa.array(np.zeros(len(df), dtype=np.int32))
+        stock_names = pa.DictionaryArray.from_arrays(indices, pa.array([company_name(file_path)], pa.string()))
+        df["Stock_Name"] = pd.array(stock_names, dtype=pd.ArrowDtype(STOCK_NAME_ARROW_TYPE))
+    else:
+        df["Stock_Name"] = pd.Categorical([company_name(file_path)] * len(df))
+    return df
+
+
+# Function to concatenate pandas frames without losing the Stock_Name categorical. pd.concat falls
+# back to object when the categories differ, so every part is given the union of the categories first
+def concat_pandas(dfs):
+    dfs = [df for df in dfs if df is not None]
+    if all(isinstance(df["Stock_Name"].dtype, pd.CategoricalDtype) for df in dfs):
+        categories = sorted(set().union(*(df["Stock_Name"].cat.categories for df in dfs)))
+        dfs = [df.assign(Stock_Name=df["Stock_Name"].cat.set_categories(categories)) for df in dfs]
+    return pd.concat(dfs, ignore_index=True)
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pandas as pd
+import polars as pl
+import pyarrow.dataset as ds
+
+from benchmark import columnar_cache
+from benchmark import schema
+from benchmark.memory import PeakRSSSampler
+
+PANDAS_CHUNK_ROWS = 1_000_000
+
+
+# Function to estimate the size of a CSV without materializing it. The on-disk size comes from
+# file metadata; the row count and in-memory size are extrapolated from the first sample_rows rows
+def estimate_csv_size(file_path, sample_rows=100_000):
+    file_size_bytes = os.path.getsize(file_path)
+    sample_df = pl.read_csv(file_path, n_rows=sample_rows, schema_overrides=schema.POLARS_SCHEMA)
+    if sample_df.height == 0:
+        return {"file_size_bytes": file_size_bytes, "estimated_rows": 0, "estimated_memory_bytes": 0}
+
+    # Bytes taken by the header plus the sampled rows on disk
+    with open(file_path, "rb") as csv_file:
+        sample_bytes = 0
+        for line_number, line in enumerate(csv_file):
+            if line_number > sample_df.height:
+                break
+            sample_bytes += len(line)
+
+    if sample_df.height < sample_rows:
+        # The sample is the whole file, nothing to extrapolate
+        estimated_rows = sample_df.height
+    else:
+        estimated_rows = int(file_size_bytes / sample_bytes * sample_df.height)
+    bytes_per_row = sample_df.estimated_size() / sample_df.height
+    return {
+        "file_size_bytes": file_size_bytes,
+        "estimated_rows": estimated_rows,
+        "estimated_memory_bytes": int(bytes_per_row * estimated_rows),
+    }
+
+
+# Function to collect a lazy query on the chosen engine ("streaming" or "in-memory") while sampling
+# peak RSS. Returns the result, the elapsed time and the peak RSS growth in bytes
+def collect_measured(lazy_df, engine="streaming"):
+    with PeakRSSSampler() as sampler:
+        start_time = time.time()
+        result_df = lazy_df.collect(engine=engine)
+        elapsed_time = time.time() - start_time
+    return result_df, elapsed_time, sampler.peak_delta_bytes
+
+
+# Function to read a file into pandas chunk by chunk, only the given columns, from the CSV or from its
+# columnar cache copy, or from a Parquet data file. Only one chunk is in memory at a time
+def iter_pandas_chunks(file_path, columns, chunk_rows=PANDAS_CHUNK_ROWS, use_columnar_cache=False, cache_format="parquet"):
+    if schema.is_parquet(file_path):
+        # Parquet data files are read in batches directly, cast to the declared types
+        for batch in ds.dataset(file_path, format="parquet").to_batches(columns=columns, batch_size=chunk_rows):
+            yield schema.cast_pandas(batch.to_pandas())
+        return
+    if not use_columnar_cache:
+        yield from pd.read_csv(file_path, chunksize=chunk_rows, **schema.pandas_read_options(columns))
+        return
+    cached_path, _ = columnar_cache.ensure_cached(file_path, cache_format)
+    dataset = ds.dataset(cached_path, format="parquet" if cache_format == "parquet" else "ipc")
+    for batch in dataset.to_batches(columns=columns, batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+# Function to run filter(close > 50) -> group by company -> total volume and mean close in pandas
+# without holding the file in memory. Each chunk is reduced to partial aggregates per company
+# (volume sum, close sum, close count) that are folded into a running total, and the mean is
+# computed from the totals at the end, so the result matches a whole-file groupby.
+# Returns the result indexed by company, the elapsed time and the peak RSS growth in bytes
+def aggregate_pandas_chunked(file_path, chunk_rows=PANDAS_CHUNK_ROWS, use_columnar_cache=False, cache_format="parquet"):
+    with PeakRSSSampler() as sampler:
+        start_time = time.time()
+        totals = None
+        for chunk in iter_pandas_chunks(file_path, ["company", "close", "volume"], chunk_rows, use_columnar_cache, cache_format):
+            filtered_chunk = chunk[chunk["close"] > 50]
+            partial = filtered_chunk.groupby(filtered_chunk["company"].astype(str)).agg(
+                volume_sum=("volume", "sum"),
+                close_sum=("close", "sum"),
+                close_count=("close", "count"),
+            )
+            # Companies seen in only one of the two frames keep their values
+            totals = partial if totals is None else totals.add(partial, fill_value=0)
+        if totals is None:
+            totals = pd.DataFrame({"volume_sum": [], "close_sum": [], "close_count": []})
+        grouped_df = pd.DataFrame({
+            "total_volume": totals["volume_sum"],
+            "average_close": totals["close_sum"] / totals["close_count"],
+        }).sort_index().rename_axis("company")
+        elapsed_time = time.time() - start_time
+    return grouped_df, elapsed_time, sampler.peak_delta_bytes
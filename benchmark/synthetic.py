@@ -0,0 +1,221 @@
+import argparse
+import glob
+import io
+import math
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+from benchmark import schema
+
+# Generated files live next to the app, like archive/, so the pages can glob them
+SYNTHETIC_DIR = "synthetic"
+FILE_FORMATS = ["csv", "parquet"]
+LAYOUTS = ["per-company", "combined"]
+COMPANY_PREFIX = "SYN"
+
+# NSE minute bars: 375 one-minute bars per trading day from 09:15, weekdays only
+START_DATE = "2015-02-02"
+SESSION_START_MINUTE = 9 * 60 + 15
+BARS_PER_DAY = 375
+
+# Rows generated at a time inside a worker, so memory stays bounded whatever the file size
+BATCH_ROWS = 1_000_000
+CALIBRATION_ROWS = 100_000
+# Companies start at a base price drawn from this range. Size calibration uses its middle, since
+# higher prices take more digits in CSV and compress worse in Parquet
+BASE_PRICE_RANGE = (20.0, 3000.0)
+
+
+# Function to name the synthetic companies
+def company_names(companies):
+    return [f"{COMPANY_PREFIX}{index:04d}" for index in range(companies)]
+
+
+# Function to split the rows between companies. With skew 0 every company gets the same share;
+# higher skew follows a Zipf law, so the first companies hold most of the rows
+def company_row_counts(total_rows, companies, skew=1.0):
+    weights = 1.0 / np.arange(1, companies + 1) ** skew
+    counts = np.floor(total_rows * weights / weights.sum()).astype(np.int64)
+    counts[0] += total_rows - counts.sum()
+    return counts.tolist()
+
+
+# Function to get the timestamps of minute bars start_row to start_row + rows of one company
+def bar_dates(start_row, rows):
+    bar_index = np.arange(start_row, start_row + rows, dtype=np.int64)
+    day_index = bar_index // BARS_PER_DAY
+    first_day = day_index[0] if rows else 0
+    # Look up each trading day once rather than once per bar
+    trading_days = np.busday_offset(START_DATE, np.arange(first_day, day_index[-1] + 1 if rows else 0), roll="forward")
+    minutes = SESSION_START_MINUTE + bar_index % BARS_PER_DAY
+    dates = trading_days[day_index - first_day].astype("datetime64[m]") + minutes.astype("timedelta64[m]")
+    return dates.astype("datetime64[us]")
+
+
+# Function to generate a batch of OHLCV bars as a geometric random walk starting at start_price
+def generate_batch(rng, start_row, rows, start_price, company=None):
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0, 0.001, rows)))
+    previous_close = np.concatenate([[start_price], close[:-1]])
+    open_price = previous_close * np.exp(rng.normal(0.0, 0.0002, rows))
+    spread = np.abs(rng.normal(0.0, 0.0005, rows))
+    df = pl.DataFrame({
+        "date": bar_dates(start_row, rows),
+        "open": np.round(open_price, 2),
+        "high": np.round(np.maximum(open_price, close) * (1 + spread), 2),
+        "low": np.round(np.minimum(open_price, close) * (1 - spread), 2),
+        "close": np.round(close, 2),
+        "volume": rng.lognormal(8.0, 1.0, rows).astype(np.int64),
+    })
+    if company is not None:
+        df = df.with_columns(pl.lit(company).alias("company"))
+    return df
+
+
+# Function to estimate the bytes one row takes on disk in the given format
+def bytes_per_row(file_format="csv", with_company=False):
+    sample_df = generate_batch(np.random.default_rng(0), 0, CALIBRATION_ROWS, sum(BASE_PRICE_RANGE) / 2, "SAMPLE" if with_company else None)
+    buffer = io.BytesIO()
+    if file_format == "csv":
+        sample_df.write_csv(buffer, datetime_format="%Y-%m-%d %H:%M:%S")
+    else:
+        # The same writer as write_part, so the compression matches
+        pq.write_table(sample_df.to_arrow(), buffer)
+    return buffer.tell() / CALIBRATION_ROWS
+
+
+# Runs in the writer processes: generates one file batch by batch and writes it under a temporary
+# name, so an interrupted run never leaves a file that looks complete
+def write_part(job):
+    rng = np.random.default_rng([job["seed"], job["company_index"], job["part_index"]])
+    # Each part starts where a walk from the company's base price would plausibly be by then
+    base_price = np.random.default_rng([job["seed"], job["company_index"]]).uniform(*BASE_PRICE_RANGE)
+    price = base_price * math.exp(rng.normal(0.0, 0.001 * math.sqrt(job["start_row"] + 1)))
+    tmp_path = f"{job['path']}.tmp-{os.getpid()}"
+    parquet_writer = None
+    with open(tmp_path, "wb") as file:
+        for batch_start in range(0, job["rows"], BATCH_ROWS):
+            batch_rows = min(BATCH_ROWS, job["rows"] - batch_start)
+            batch_df = generate_batch(rng, job["start_row"] + batch_start, batch_rows, price, job["company"] if job["with_company"] else None)
+            price = batch_df["close"][-1]
+            if job["file_format"] == "csv":
+                batch_df.write_csv(file, include_header=batch_start == 0, datetime_format="%Y-%m-%d %H:%M:%S")
+            else:
+                batch_table = batch_df.to_arrow()
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(file, batch_table.schema)
+                parquet_writer.write_table(batch_table)
+        if parquet_writer is not None:
+            parquet_writer.close()
+    os.replace(tmp_path, job["path"])
+    return job["path"]
+
+
+# Function to merge the parts of the combined layout into one file, in order
+def merge_parts(part_paths, output_path, file_format="csv"):
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+    if file_format == "csv":
+        with open(tmp_path, "wb") as output_file:
+            for part_index, part_path in enumerate(part_paths):
+                with open(part_path, "rb") as part_file:
+                    header = part_file.readline()
+                    if part_index == 0:
+                        output_file.write(header)
+                    shutil.copyfileobj(part_file, output_file)
+    else:
+        pl.scan_parquet(part_paths).sink_parquet(tmp_path)
+    os.replace(tmp_path, output_path)
+    for part_path in part_paths:
+        os.remove(part_path)
+
+
+# Function to remove the files of an earlier generation in the same format, so a glob over the
+# directory only sees the new data
+def remove_previous(output_dir, file_format="csv"):
+    for file_path in glob.glob(os.path.join(output_dir, f"{COMPANY_PREFIX}*.{file_format}")):
+        os.remove(file_path)
+    combined_path = os.path.join(output_dir, f"combined.{file_format}")
+    if os.path.exists(combined_path):
+        os.remove(combined_path)
+
+
+# Function to generate about size_gb of NSE-like minute bars. "per-company" writes one file per
+# company like archive/, splitting companies larger than max_file_gb into COMPANY__NNN parts so size
+# tiers can be filled closely; "combined" writes one file with a company column like
+# combined_data3gb.csv. Files are written in parallel and the same seed gives the same data.
+# Returns the written paths
+def generate(output_dir=SYNTHETIC_DIR, size_gb=1.0, companies=50, skew=1.0, file_format="csv", layout="per-company",
+             max_file_gb=0.25, seed=0, workers=None):
+    with_company = layout == "combined"
+    total_rows = int(size_gb * (1024 ** 3) / bytes_per_row(file_format, with_company))
+    max_file_rows = max(1, int(max_file_gb * (1024 ** 3) / bytes_per_row(file_format, with_company)))
+
+    os.makedirs(output_dir, exist_ok=True)
+    remove_previous(output_dir, file_format)
+    jobs = []
+    names = company_names(companies)
+    for company_index, company_rows in enumerate(company_row_counts(total_rows, companies, skew)):
+        part_count = math.ceil(company_rows / max_file_rows)
+        for part_index in range(part_count):
+            start_row = part_index * max_file_rows
+            if part_count == 1:
+                file_name = f"{names[company_index]}.{file_format}"
+            else:
+                file_name = f"{names[company_index]}{schema.PART_SEPARATOR}{part_index:03d}.{file_format}"
+            jobs.append({
+                "path": os.path.join(output_dir, file_name),
+                "company": names[company_index],
+                "company_index": company_index,
+                "part_index": part_index,
+                "start_row": start_row,
+                "rows": min(max_file_rows, company_rows - start_row),
+                "seed": seed,
+                "file_format": file_format,
+                "with_company": with_company,
+            })
+
+    # spawn rather than fork: the Streamlit server runs threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=context) as pool:
+        paths = list(pool.map(write_part, jobs))
+
+    if layout == "combined":
+        combined_path = os.path.join(output_dir, f"combined.{file_format}")
+        merge_parts(paths, combined_path, file_format)
+        return [combined_path]
+    return paths
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark.synthetic",
+        description="Generate NSE-like OHLCV minute bars for scale tests without the Kaggle archive",
+    )
+    parser.add_argument("--output-dir", default=SYNTHETIC_DIR, help="Directory to write to (default: %(default)s)")
+    parser.add_argument("--size-gb", type=float, default=1.0, help="Approximate total size on disk (default: %(default)s)")
+    parser.add_argument("--companies", type=int, default=50, help="Number of companies (default: %(default)s)")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of rows per company, 0 for uniform (default: %(default)s)")
+    parser.add_argument("--format", choices=FILE_FORMATS, default="csv")
+    parser.add_argument("--layout", choices=LAYOUTS, default="per-company",
+                        help="per-company: one file per company like archive/; combined: one file with a company column")
+    parser.add_argument("--max-file-gb", type=float, default=0.25, help="Split per-company files above this size (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="Writer processes (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = generate(args.output_dir, args.size_gb, args.companies, args.skew, args.format, args.layout,
+                     args.max_file_gb, args.seed, args.workers)
+    total_gb = sum(os.path.getsize(path) for path in paths) / (1024 ** 3)
+    print(f"Wrote {len(paths)} files, {total_gb:.2f} GB, to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import time
+
+import numpy as np
+
+
+# Function to run a callable warmup + repeats times and time each repeat with perf_counter_ns.
+# before_each runs untimed before every timed repeat (e.g. to drop the page cache).
+# Returns the timings in nanoseconds and the result of the last call
+def time_repeats(run, warmup=0, repeats=1, before_each=None):
+    result = None
+    for _ in range(warmup):
+        result = run()
+    samples_ns = []
+    for _ in range(max(repeats, 1)):
+        if before_each is not None:
+            before_each()
+        start_ns = time.perf_counter_ns()
+        result = run()
+        samples_ns.append(time.perf_counter_ns() - start_ns)
+    return samples_ns, result
+
+
+# Function to summarize timings: min, median, p95 and a bootstrap confidence interval of the median.
+# A single sample has no spread, so its interval collapses to the sample itself
+def summarize(samples_ns, confidence=0.95, resamples=2000, seed=0):
+    samples_s = np.asarray(samples_ns, dtype=np.float64) / 1e9
+    if len(samples_s) > 1:
+        rng = np.random.default_rng(seed)
+        resampled = rng.choice(samples_s, size=(resamples, len(samples_s)), replace=True)
+        medians = np.median(resampled, axis=1)
+        tail = (1 - confidence) / 2 * 100
+        ci_low, ci_high = np.percentile(medians, [tail, 100 - tail])
+    else:
+        ci_low = ci_high = samples_s[0]
+    return {
+        "time_s": float(np.median(samples_s)),
+        "min_s": float(samples_s.min()),
+        "p95_s": float(np.percentile(samples_s, 95)),
+        "ci_low_s": float(ci_low),
+        "ci_high_s": float(ci_high),
+        "repeats": len(samples_s),
+    }
+
+
+# Function to evict files from the OS page cache so the next read comes from disk.
+# Only clean pages can be dropped and only where posix_fadvise exists; returns whether it was applied
+def drop_page_cache(file_paths):
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            continue
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
@@ -1,10 +1,20 @@
 import streamlit as st
-import pandas as pd
-import polars as pl
-import time
-import os
-import sys
 import glob
+import os
+import pandas as pd
+from benchmark import columnar_cache
+from benchmark import external_sort
+from benchmark import interop
+from benchmark import jobs
+from benchmark import loaders
+from benchmark import loadtest
+from benchmark import manifest
+from benchmark import operations
+from benchmark import partitioned
+from benchmark import memory
+from benchmark import results
+from benchmark import scaling
+from benchmark import synthetic
 
 st.set_page_config(
     page_title="Polars v Pandas", 
@@ -49,274 +59,287 @@ st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 st.title('Speed & Memory Efficiency: Polars vs Pandas')
 
 st.markdown("""This application compares the performance of **Polars** and **Pandas** for the following operations on the Indian National Stock Exchange dataset listed below""")
-st.markdown('- Aggregation & Group By \n- Searching \n- Sorting')
+st.markdown('- Aggregation & Group By \n- Searching \n- Sorting \n- Rolling mean of close per company \n- Join with a company dimension table \n- As-of join on date with a daily market calendar \n- Group by company and day with several aggregations \n- Distinct count per company \n- Top-5 volume bars per company')
+
+# Generated data stands in for the Kaggle archive on machines without it and goes past its 3 GB
+data_source = st.radio("Dataset", ["NSE archive", "Synthetic"], horizontal=True,
+                       format_func=lambda source: {"NSE archive": "NSE archive (archive/*.csv)", "Synthetic": f"Synthetic ({synthetic.SYNTHETIC_DIR}/*.csv)"}[source])
+size_tiers_gb = sorted(st.multiselect("Size tiers (GB)", [1, 2, 3, 5, 10, 50], default=[1, 2, 3]))
+with st.expander("Generate synthetic NSE-like data"):
+    st.caption("Minute bars (date, open, high, low, close, volume) from a random walk per company, written as CSV in parallel. "
+               f"Replaces the earlier synthetic CSVs in {synthetic.SYNTHETIC_DIR}/; the same seed gives the same data")
+    size_column, companies_column, skew_column, seed_column = st.columns(4)
+    synthetic_size_gb = size_column.number_input("Total size (GB)", min_value=0.01, value=float(max(size_tiers_gb, default=3)), step=1.0)
+    synthetic_companies = companies_column.number_input("Companies", min_value=1, value=50, step=1)
+    synthetic_skew = skew_column.number_input("Skew (Zipf exponent, 0 = uniform)", min_value=0.0, value=1.0, step=0.1)
+    synthetic_seed = seed_column.number_input("Seed", min_value=0, value=0, step=1)
+    if st.button("Generate"):
+        with st.spinner("Writing synthetic data...Please wait"):
+            synthetic_paths = synthetic.generate(synthetic.SYNTHETIC_DIR, synthetic_size_gb, synthetic_companies, synthetic_skew, seed=synthetic_seed)
+        st.success(f"Wrote {len(synthetic_paths)} files to {synthetic.SYNTHETIC_DIR}/")
+
+# The NSE files never change, so they can be converted once to a columnar format and scanned from there
+read_source = st.radio("Read the data from", ["Raw CSV", "Columnar cache"], horizontal=True)
+cache_format = st.selectbox("Columnar cache format", ["parquet", "ipc"], disabled=read_source == "Raw CSV")
+compare_formats = st.checkbox("Show cold CSV and warm columnar read times side by side")
+use_columnar_cache = read_source == "Columnar cache"
+# A worker per (engine, tier) keeps one engine's leftovers out of the other's numbers and an OOM out of the server
+run_isolated = st.checkbox("Run each engine and size tier in an isolated worker process")
+memory_limit_gb = st.number_input("Worker memory cap in GB (0 = no cap)", min_value=0.0, value=0.0, step=1.0, disabled=not run_isolated,
+                                  help="Applied as RLIMIT_AS, which counts reserved virtual memory, so leave generous headroom")
+# The original serial chunked reader stays the default so older runs remain comparable
+pandas_ingest = st.radio("Pandas ingest", loaders.PANDAS_INGEST_MODES, horizontal=True,
+                         format_func=lambda ingest: {"chunked": "Serial, 5000-row chunks", "parallel": "Parallel whole files (pyarrow parser, typed dtypes)",
+                                                     "arrow": "Whole files into pyarrow-backed dtypes"}[ingest])
+measurement_mode = st.radio("Measurement mode", list(operations.MODES), horizontal=True,
+                            format_func=lambda mode: {"eager": "Eager vs eager", "end_to_end": "Lazy end-to-end vs read+compute"}[mode])
+st.caption(operations.MODES[measurement_mode])
+warmup_column, repeats_column, cache_column = st.columns(3)
+warmup_runs = warmup_column.number_input("Warmup runs", min_value=0, value=0, step=1)
+timed_repeats = repeats_column.number_input("Timed repeats", min_value=1, value=3, step=1)
+cold_cache = cache_column.checkbox("Cold runs (drop the files from the page cache before every timed read)")
+
+# The benchmark runs in a background thread and its job lives in session state, so the page stays
+# usable and every rerun picks the same job up again
+benchmark_job = st.session_state.get("benchmark_job")
+job_running = benchmark_job is not None and not benchmark_job.poll().finished
 
-percent_complete = 0
 polars_column, pandas_column = st.columns(2)
-hide_button_code = st.empty()
-compute_executions = hide_button_code.button("Execute the computations", type='primary')
-
-pandas_container = st.container()
-polars_container = st.container()
-polars_progress_text = "Loading data and performing required computations using Polars...Please wait"
-pandas_progress_text = "Loading data and performing required computation using Pandas...Yeah, this is going to take a long, long time..."
-
-file_paths = glob.glob("archive/*.csv")
+compute_executions = st.button("Execute the computations", type='primary', disabled=job_running)
+# Runs from the command line (python -m benchmark) and from this page are saved and can be viewed here
+saved_runs = sorted(glob.glob(os.path.join(results.RESULTS_DIR, "*.json")), reverse=True)
+selected_run = st.selectbox("Or view a saved benchmark run", ["(none)"] + saved_runs)
+
+# Sorted by path so every machine puts the same files in the same tier
+data_glob = "archive/*.csv" if data_source == "NSE archive" else os.path.join(synthetic.SYNTHETIC_DIR, "*.csv")
+file_paths = manifest.discover(data_glob)
+
+# Function to show which files make up each tier, with the details recorded in the manifest
+def display_manifest(file_paths, size_tiers_gb):
+    manifest_rows = []
+    for size_limit_gb, new_entries in loaders.split_into_tiers(file_paths, size_tiers_gb):
+        for entry in new_entries:
+            manifest_rows.append({
+                "First Tier": f"{size_limit_gb} GB",
+                "File": entry["path"],
+                "Size (GB)": round(entry["size_bytes"] / (1024 ** 3), 3),
+                "Rows": f"{entry['rows']:,}",
+                "From": entry["min_date"],
+                "To": entry["max_date"],
+                "SHA-256": entry["sha256"][:12],
+            })
+    st.table(manifest_rows)
+
+# The first look at new files hashes and counts them, so the manifest is only shown on request
+if st.checkbox(f"Show the files in each size tier (recorded in the {manifest.MANIFEST_NAME} next to them)"):
+    with st.spinner("Indexing new or changed files...Please wait"):
+        display_manifest(file_paths, size_tiers_gb)
+
+# Function to lay out the placeholders one engine's results are drawn into
+def engine_placeholders(engine, column):
+    column.subheader(f"Performance Metrics for Dataset Sizes For {engine}:")
+    column.caption("Median time with its 95% bootstrap interval in brackets")
+    placeholders = {"errors": column.empty(), "timing": column.empty()}
+    column.markdown("Memory Usage (RSS sampled while each step runs):")
+    placeholders["memory"] = column.empty()
+    placeholders["sizes"] = column.empty()
+    placeholders["spread"] = column.expander("Timing spread (min, median, p95, 95% bootstrap CI)").empty()
+    return placeholders
+
+# Function to draw an out-of-core sort run, with the tiers that did not fit the budget
+def display_external_sort(run):
+    for engine in run["settings"]["engines"]:
+        for message in results.failures(run["records"], engine):
+            st.error(f"{engine}: {message}")
+    st.table(external_sort.external_sort_table(run["records"]))
+
+# Function to draw one engine's results from the run records
+def display_engine_results(records, engine, placeholders):
+    for message in results.failures(records, engine):
+        placeholders["errors"].error(message)
+    placeholders["timing"].table(results.timing_table(records, engine))
+    placeholders["spread"].table(results.spread_table(records, engine))
+    memory_rows = results.memory_table(records, engine)
+    placeholders["memory"].table(memory_rows)
+    size_strings = []
+    for memory_row in memory_rows:
+        tier_df_value = round(memory_row['Logical Size (GB)'], 1)
+        size_strings.append(f"The estimated memory used for <span style='font-weight:bold'> {memory_row['Data Size (GB)']} </span> {engine} Dataframe is <span style='font-weight:bold'> {tier_df_value} GB </span>")
+    placeholders["sizes"].markdown("\n\n".join(size_strings), unsafe_allow_html=True)
+
+# Function to draw speedup and parallel efficiency charts from a thread-scaling run
+def display_scaling(run):
+    measured_tiers = sorted({record["size_tier_gb"] for record in run["records"] if record["status"] == "ok"})
+    if not measured_tiers:
+        st.warning("No size tier could be measured")
+        return
+    scaling_tier = st.selectbox("Size tier", measured_tiers, index=len(measured_tiers) - 1, format_func=lambda tier: f"{tier} GB")
+    scaling_df = pd.DataFrame(scaling.scaling_table(run["records"], scaling_tier))
+    speedup_column, efficiency_column = st.columns(2)
+    speedup_column.markdown("Speedup over Polars on 1 thread")
+    speedup_column.line_chart(scaling_df.pivot(index="Threads", columns="Operation", values="Speedup"))
+    efficiency_column.markdown("Parallel efficiency (speedup / threads)")
+    efficiency_column.line_chart(scaling_df.pivot(index="Threads", columns="Operation", values="Parallel Efficiency"))
+    st.table(scaling_df)
+
+run_options = {
+    "mode": measurement_mode,
+    "warmup": warmup_runs,
+    "repeats": timed_repeats,
+    "cold_cache": cold_cache,
+    "isolated": run_isolated,
+    "memory_limit_gb": memory_limit_gb or None,
+    "use_columnar_cache": use_columnar_cache,
+    "cache_format": cache_format,
+    "pandas_ingest": pandas_ingest,
+}
+
+# Function to draw a background benchmark: progress in bytes read, the latest steps and the results
+# so far. While live it reruns every second on its own; once the job ends it reruns the whole page
+# once more so the polling stops and the Execute button comes back
+def display_job(job, live):
+    job.poll()
+    if live and job.finished:
+        st.rerun()
+    if job.status == "queued":
+        st.info("Waiting for another benchmark on this server to finish...")
+    st.progress(job.progress_fraction, text=f"{memory.bytes_to_gb(job.bytes_done, 2)} of {memory.bytes_to_gb(job.total_bytes, 2)} GB read")
+    if not job.finished:
+        if st.button("Cancel the benchmark"):
+            job.cancel()
+            st.caption("Cancelling after the current step...")
+        st.code("\n".join(job.recent_steps) or "Starting...")
+    elif job.status == "done":
+        st.caption(f"Saved this run to {job.saved_path}")
+    elif job.status == "cancelled":
+        st.warning("The benchmark was cancelled; the tiers that finished are shown below")
+    else:
+        st.error(f"The benchmark failed: {job.error}")
+    job_polars_column, job_pandas_column = st.columns(2)
+    for engine, column in [("Polars", job_polars_column), ("Pandas", job_pandas_column)]:
+        if any(record["engine"] == engine for record in job.run["records"]):
+            display_engine_results(job.run["records"], engine, engine_placeholders(engine, column))
+
+# Function to draw a benchmark started from one of the sections below: its latest steps while it runs
+# and the finished run once it is done. Like display_job it reruns the page once more when the job ends
+def display_run_job(job, live, job_key, display_run):
+    job.poll()
+    if live and job.finished:
+        st.rerun()
+    if job.status == "queued":
+        st.info("Waiting for another benchmark on this server to finish...")
+    if not job.finished:
+        if st.button("Cancel", key=f"cancel-{job_key}"):
+            job.cancel()
+            st.caption("Cancelling after the current step...")
+        st.code("\n".join(job.recent_steps) or "Starting...")
+    elif job.status == "done":
+        st.caption(f"Saved this run to {job.saved_path}")
+        display_run(job.run)
+    elif job.status == "cancelled":
+        st.warning("The benchmark was cancelled")
+    else:
+        st.error(f"The benchmark failed: {job.error}")
+
+# Function to queue a section's benchmark in the background executor when its button is pressed, and
+# draw the last one the section started in this session
+def run_section_job(job_key, button_label, display_run, run_function, *args, **kwargs):
+    if st.button(button_label):
+        st.session_state[job_key] = jobs.submit(run_function, *args, **kwargs)
+    job = st.session_state.get(job_key)
+    if job is not None:
+        live = not job.poll().finished
+        st.fragment(display_run_job, run_every=1.0 if live else None)(job, live, job_key, display_run)
+
+####COLD CSV VS WARM COLUMNAR####
+
+# Timed before the benchmark starts so the two never compete for the same cores
+if compute_executions and compare_formats:
+    # Use the same files as the largest size tier
+    compared_files = [entry["path"] for _, new_entries in loaders.split_into_tiers(file_paths, size_tiers_gb) for entry in new_entries]
+
+    if compared_files:
+        st.subheader("Read Time by File Format")
+        with st.spinner("Timing raw CSV and columnar reads...Please wait"):
+            format_results, conversion_time = columnar_cache.compare_read_times(compared_files, cache_format)
+        st.table(format_results)
+        st.markdown(f"One-off conversion to {cache_format.upper()} for this run took <span style='font-weight:bold'> {conversion_time:.2f} s </span> (0 when the cache was already warm)", unsafe_allow_html=True)
+
+####BENCHMARK JOB####
 
 if compute_executions:
-    hide_button_code.empty()
-# Function to calculate file size in GB
-    def get_file_size_in_gb(file_path):
-        return os.path.getsize(file_path) / (1024 ** 3)  # Convert bytes to GB
-
-    # Function to lazily scan files up to a given size limit and measure reading time
-    def scan_files_upto_limit(file_paths, size_limit_gb):
-        total_size_gb = 0
-        lazy_frames = []
-        start_time = time.time()  # Start timing the reading process
-        for file_path in file_paths:
-            file_size_gb = get_file_size_in_gb(file_path)
-            if total_size_gb + file_size_gb > size_limit_gb:
-                break
-            total_size_gb += file_size_gb
-
-            # Extract company name from filename
-            company_name = os.path.basename(file_path).replace(".csv", "")
-
-            print(f"Scanning file: {file_path}, Size: {file_size_gb:.2f} GB, Total Size: {total_size_gb:.2f} GB")
-            lazy_df = pl.scan_csv(file_path)
-            
-            # Avoid adding columns or doing operations during scanning
-            lazy_df = lazy_df.with_columns([
-                pl.col("volume").cast(pl.Float64),  # Ensure 'volume' is Float64
-                pl.col("open").cast(pl.Float64),    # Ensure 'open' is Float64
-                pl.lit(company_name).alias("Stock_Name")  # Add company name as a column
-            ])
-            lazy_frames.append(lazy_df)
-        reading_time = time.time() - start_time  # Total reading time
-        return pl.concat(lazy_frames) if lazy_frames else None, reading_time
-
-    # Function to measure time for operations
-    def measure_operations_lazy(lazy_df):
-        results = {}
-
-        # Focus only on 'Stock_Name', 'volume', and 'date'
-        selected_df = lazy_df.select(["Stock_Name", "volume", "date"])
-        selected_df_final = selected_df.collect()
-
-        # Group By & Aggregation
-        start_time = time.time()
-        groupby_result = selected_df.group_by("date").agg(pl.sum("volume").alias("Total Volume"))
-        groupby_result = groupby_result.collect()
-        results["Group By & Aggregation Time (s)"] = round(time.time() - start_time, 2)
-
-        # Search
-        start_time = time.time()
-        search_result = selected_df.filter(pl.col("volume") > 1000)
-        search_result = search_result.collect()
-        results["Search Time (s)"] = round(time.time() - start_time, 2)
-
-        # Sorting
-        start_time = time.time()
-        sorted_result = selected_df.sort("date")
-        sorted_result = sorted_result.collect()
-        results["Sorting Time (s)"] = round(time.time() - start_time, 2)
-
-        return results, selected_df_final
-
-    # Track results for each dataset size
-    results = []
-    #data_table_display_polars = st.empty()
-    data_table_display_pandas = st.empty()
-
-    polars_column.subheader("Performance Metrics for Dataset Sizes For Polars:")
-    data_table_display_polars = polars_column.empty()
-    polars_progress_bar = polars_column.progress(0, text=polars_progress_text)
-    with st.spinner("Performing computations...Please wait"):
-        # Measure for 1GB dataset
-        while percent_complete < 100:
-            lazy_df_1gb, reading_time_1gb = scan_files_upto_limit(file_paths, 1)
-            if lazy_df_1gb is not None:
-                result_1gb, result_df_1gb = measure_operations_lazy(lazy_df_1gb)
-                results_1gb_final = {'Data Size (GB)':'1 GB','Reading Time(s)':reading_time_1gb}
-                results_1gb_final.update(result_1gb)
-                results.append(results_1gb_final)
-                
-                data_table_display_polars.table(results)
-
-                one_gig_df_value = round((result_df_1gb.estimated_size('mb')) / 1000, 1)
-                one_gig_data_string = f"The estimated memory used for <span style='font-weight:bold'> 1 GB </span> Polars Dataframe is <span style='font-weight:bold'> {one_gig_df_value} GB </span>"
-                polars_column.markdown(one_gig_data_string, unsafe_allow_html=True)
-            
-            percent_complete += 33
-            polars_progress_bar.progress(percent_complete, text=polars_progress_text)
-
-            # Measure for 2GB dataset
-            lazy_df_2gb, reading_time_2gb = scan_files_upto_limit(file_paths, 2)
-            if lazy_df_2gb is not None:
-                result_2gb, result_df_2gb = measure_operations_lazy(lazy_df_2gb)
-                results_2gb_final = {'Data Size (GB)':'2 GB','Reading Time(s)':reading_time_2gb}
-                results_2gb_final.update(result_2gb)
-                results.append(results_2gb_final)
-                
-                data_table_display_polars.empty()
-                data_table_display_polars.table(results)
-
-                two_gig_df_value = round((result_df_2gb.estimated_size('mb')) / 1000, 1)
-                two_gig_data_string = f"The estimated memory used for <span style='font-weight:bold'> 2 GB </span> Polars Dataframe is <span style='font-weight:bold'> {two_gig_df_value} GB </span>"
-                polars_column.markdown(two_gig_data_string, unsafe_allow_html=True)
-            
-            percent_complete += 33
-            polars_progress_bar.progress(percent_complete, text=polars_progress_text)
-
-            # Measure for 3GB dataset
-            lazy_df_3gb, reading_time_3gb = scan_files_upto_limit(file_paths, 3)
-            if lazy_df_3gb is not None:
-                result_3gb, result_df_3gb = measure_operations_lazy(lazy_df_3gb)
-                results_3gb_final = {'Data Size (GB)':'3 GB','Reading Time(s)':reading_time_3gb}
-                results_3gb_final.update(result_3gb)
-                results.append(results_3gb_final)
-                
-                data_table_display_polars.empty()
-                data_table_display_polars.table(results)
-
-                three_gig_df_value = round((result_df_3gb.estimated_size('mb')) / 1000, 1)
-                three_gig_data_string = f"The estimated memory used for <span style='font-weight:bold'> 3 GB </span> Polars Dataframe is <span style='font-weight:bold'> {three_gig_df_value} GB </span>"
-                polars_column.markdown(three_gig_data_string, unsafe_allow_html=True)
-                #st.table(results)
-            
-            percent_complete += 34
-            polars_progress_bar.progress(percent_complete, text=polars_progress_text)
-
-        percent_complete = 0
-        polars_progress_bar.empty()
-
-        # Convert results to a DataFrame
-        results_df = pd.DataFrame(results)
-
-        # Display the results
-        #st.subheader("Performance Metrics for Dataset Sizes For Polars:")
-        #st.table(results_df)
-
-    ####CODE FOR PANDAS####
-
-    # Function to read files up to a given size limit and measure reading time
-    def read_files_upto_limit_pandas(file_paths, size_limit_gb):
-        chunk_size = 5000
-        total_size_gb = 0
-        dfs = []
-        start_time = time.time()  # Start timing the reading process
-        for file_path in file_paths:
-            file_size_gb = get_file_size_in_gb(file_path)
-            if total_size_gb + file_size_gb > size_limit_gb:
-                break
-            total_size_gb += file_size_gb
-
-            # Extract company name from filename
-            company_name = os.path.basename(file_path).replace(".csv", "")
-
-            print(f"Reading file: {file_path}, Size: {file_size_gb:.2f} GB, Total Size: {total_size_gb:.2f} GB")
-            df_chunks = pd.read_csv(file_path, chunksize=chunk_size)
-            
-            for chunks in df_chunks:
-                # Ensure 'volume' and 'open' columns are Float64 and add 'Stock_Name' column
-                chunks["volume"] = chunks["volume"].astype("float64")
-                chunks["open"] = chunks["open"].astype("float64")
-                chunks["Stock_Name"] = company_name
-
-                dfs.append(chunks)
-
-        reading_time = time.time() - start_time  # Total reading time
-        return pd.concat(dfs, ignore_index=True), reading_time
-
-    # Function to measure time for operations
-    def measure_operations_pandas(df):
-        results = {}
-
-        # Focus only on 'Stock_Name', 'volume', and 'date'
-        selected_df = df.loc[:, ["Stock_Name", "volume", "date"]]
-        _ = st.empty()
-
-        # Group By & Aggregation
-        start_time = time.time()
-        selected_df.groupby("date")["volume"].sum()
-        results["Group By & Aggregation Time (s)"] = round(time.time() - start_time, 2)
-
-        # Search
-        start_time = time.time()
-        selected_df[selected_df["volume"] > 1000]
-        results["Search Time (s)"] = round(time.time() - start_time, 2)
-
-        # Sorting
-        start_time = time.time()
-        selected_df.sort_values("date")
-        results["Sorting Time (s)"] = round(time.time() - start_time, 2)
-
-        return results, selected_df
-
-    # Track results for each dataset size
-    results = []
-    df_hide_container = st.empty()
-
-    pandas_column.subheader("Performance Metrics for Dataset Sizes For Pandas:")
-    data_table_display_pandas = pandas_column.empty()
-    pandas_progress_bar = pandas_column.progress(0, text=polars_progress_text)
-    # Measure for 1GB dataset
-    #with pandas_column:
-    with st.spinner("Performing computations...Please wait"):
-        while percent_complete < 100:
-            df_1gb, reading_time_1gb = read_files_upto_limit_pandas(file_paths, 1)
-            if df_1gb is not None:
-                result_1gb, result_1gb_df = measure_operations_pandas(df_1gb)
-                results_1gb_final = {'Data Size (GB)':'1 GB','Reading Time(s)':reading_time_1gb}
-                results_1gb_final.update(result_1gb)
-                results.append(results_1gb_final)
-
-                data_table_display_pandas.table(results)
-
-                one_gig_pd_size = round(sys.getsizeof(result_1gb_df)/1000000000, 1)
-                one_gig_data_string_pandas = f"The estimated memory used for <span style='font-weight:bold'> 1 GB </span> Pandas Dataframe is <span style='font-weight:bold'> {one_gig_pd_size} GB </span>"
-                pandas_column.markdown(one_gig_data_string_pandas, unsafe_allow_html=True)
-                
-            percent_complete += 33
-            pandas_progress_bar.progress(percent_complete, text=pandas_progress_text)
-
-            # Measure for 2GB dataset
-            df_2gb, reading_time_2gb = read_files_upto_limit_pandas(file_paths, 2)
-            if df_2gb is not None:
-                result_2gb, result_2gb_df = measure_operations_pandas(df_2gb)
-                results_2gb_final = {'Data Size (GB)':'2 GB','Reading Time(s)':reading_time_2gb}
-                results_2gb_final.update(result_2gb)
-                results.append(results_2gb_final)
-
-                data_table_display_pandas.empty()
-                data_table_display_pandas.table(results)
-
-                two_gig_pd_size = round(sys.getsizeof(result_2gb_df)/1000000000, 1)
-                two_gig_data_string_pandas = f"The estimated memory used for <span style='font-weight:bold'> 2 GB </span> Pandas Dataframe is <span style='font-weight:bold'> {two_gig_pd_size} GB </span>"
-                pandas_column.markdown(two_gig_data_string_pandas, unsafe_allow_html=True)
-
-            percent_complete += 33
-            pandas_progress_bar.progress(percent_complete, text=pandas_progress_text)
-
-            # Measure for 3GB dataset
-            df_3gb, reading_time_3gb = read_files_upto_limit_pandas(file_paths, 3)
-            if df_3gb is not None:
-                result_3gb, result_3gb_df = measure_operations_pandas(df_3gb)
-                results_3gb_final = {'Data Size (GB)':'3 GB','Reading Time(s)':reading_time_3gb}
-                results_3gb_final.update(result_3gb)
-                results.append(results_3gb_final)
-
-                data_table_display_pandas.empty()
-                data_table_display_pandas.table(results)
-
-                three_gig_pd_size = round(sys.getsizeof(result_3gb_df)/1000000000, 1)
-                three_gig_data_string_pandas = f"The estimated memory used for <span style='font-weight:bold'> 3 GB </span> Pandas Dataframe is <span style='font-weight:bold'> {three_gig_pd_size} GB </span>"
-                pandas_column.markdown(three_gig_data_string_pandas, unsafe_allow_html=True)
-            percent_complete += 34
-            pandas_progress_bar.progress(percent_complete, text=pandas_progress_text)
-        percent_complete = 0
-        pandas_progress_bar.empty()
-
-        results_df_pandas = pd.DataFrame(results)
-    
\ No newline at end of file
+    benchmark_job = jobs.BenchmarkJob(file_paths, size_tiers_gb, **run_options).start()
+    st.session_state["benchmark_job"] = benchmark_job
+    job_running = True
+
+if benchmark_job is not None and selected_run == "(none)":
+    st.fragment(display_job, run_every=1.0 if job_running else None)(benchmark_job, job_running)
+
+elif selected_run != "(none)":
+    run = results.read_results(selected_run)
+    environment = run["environment"]
+    run_mode = run.get("settings", {}).get("mode", "eager")
+    if run_mode in operations.MODES:
+        st.caption(operations.MODES[run_mode])
+    st.caption(f"Measured on {environment['host']} at {environment['started_at']}: {environment['cpu_count']} CPUs, "
+               f"Polars {environment['polars_version']} ({environment['polars_thread_pool_size']} threads), Pandas {environment['pandas_version']}")
+    if "thread_counts" in run["settings"]:
+        display_scaling(run)
+    elif run_mode == "external_sort":
+        display_external_sort(run)
+    elif run_mode == "interop":
+        st.table(interop.interop_table(run["records"]))
+    elif run_mode == "partitioned":
+        st.table(partitioned.selective_query_table(run["records"]))
+    elif run_mode == "load_test":
+        st.table(loadtest.load_test_table(run["records"]))
+    else:
+        display_engine_results(run["records"], "Polars", engine_placeholders("Polars", polars_column))
+        display_engine_results(run["records"], "Pandas", engine_placeholders("Pandas", pandas_column))
+
+####THREAD SCALING####
+
+st.divider()
+st.subheader("Thread Scaling: Polars on 1 to N Cores vs Single-Threaded Pandas")
+st.markdown("Each thread count runs in a fresh process with POLARS_MAX_THREADS set, using the settings above")
+max_threads = st.number_input("Max Polars threads", min_value=1, value=os.cpu_count() or 1, step=1)
+st.caption(f"Thread counts: {', '.join(str(threads) for threads in scaling.thread_counts(max_threads))}")
+run_section_job("thread_scaling_job", "Run the thread-scaling benchmark", display_scaling,
+                scaling.run_thread_scaling, file_paths, size_tiers_gb, scaling.thread_counts(max_threads), **run_options)
+
+####POLARS <-> PANDAS INTEROP####
+
+st.divider()
+st.subheader("Interop: Handing Frames Between Polars and Pandas")
+st.markdown("Loads each tier into pandas with pyarrow-backed dtypes and converts between it and the Polars frame of the selected columns "
+            "in both directions. Shared buffers are reused by the other library without copying; copied ones cost time and memory")
+run_section_job("interop_job", "Run the interop benchmark", lambda run: st.table(interop.interop_table(run["records"])),
+                interop.run_interop, file_paths, size_tiers_gb, **run_options)
+
+####PARTITION PRUNING####
+
+st.divider()
+st.subheader("Selective Queries: Full vs Pruned Scans of a Dataset Partitioned by Company and Year")
+st.markdown(f"Rewrites the files once into {partitioned.PARTITIONED_DIR}/, partitioned by company and year, each file sorted by date with "
+            "row-group min/max statistics. Narrow queries then skip the partitions and row groups that cannot match; the full scan reads the same "
+            "dataset without any pruning, so the difference is the pruning alone")
+run_section_job("selective_queries_job", "Run the selective queries", lambda run: st.table(partitioned.selective_query_table(run["records"])),
+                partitioned.run_selective_queries, file_paths, **run_options)
+
+####OUT-OF-CORE SORT####
+
+st.divider()
+st.subheader("Out-of-Core Sort: Polars Streaming vs Pandas Sorted Runs and K-Way Merge")
+st.markdown("Sorts each tier by date into an Arrow IPC file, every repeat in a fresh worker process held to the budget the same way for both "
+            "engines. Polars uses its streaming engine, which has no memory setting and sorts in memory: the Spilled column is measured from "
+            "what the process wrote and stays near zero, so a tier it cannot hold is an OOM. Pandas sorts chunks that fit the budget, spills them as "
+            "Arrow IPC runs and merges them in passes")
+budget_column, fan_in_column = st.columns(2)
+memory_budget_gb = budget_column.number_input("Memory budget (GB)", min_value=0.01, value=external_sort.DEFAULT_MEMORY_BUDGET_GB, step=0.05,
+                                              help="Sizes the pandas runs and merge fan-in. Both engines sort in workers capped with RLIMIT_AS at this much virtual "
+                                                   "memory above their baseline, which counts mapped input files and reserved memory too")
+merge_fan_in = fan_in_column.number_input("Runs merged at once (0 = as many as the budget allows)", min_value=0, value=0, step=1)
+sort_plan = external_sort.sort_plan(int(memory_budget_gb * (1024 ** 3)))
+st.caption(f"Pandas runs of {sort_plan['run_rows']:,} rows, merged {merge_fan_in or sort_plan['fan_in']} at a time")
+run_section_job("external_sort_job", "Run the out-of-core sort", display_external_sort, external_sort.run_external_sort, file_paths,
+                size_tiers_gb, memory_budget_gb=memory_budget_gb, fan_in=merge_fan_in or None, **run_options)
@@ -2,7 +2,19 @@ import streamlit as st
 import polars as pl
 import pandas as pd
 import numpy as np
-import sys
+import altair as alt
+import time
+import functools
+from benchmark import admission
+from benchmark import columnar_cache
+from benchmark import loaders
+from benchmark import manifest
+from benchmark import memory
+from benchmark import operations
+from benchmark import plans
+from benchmark import result_cache
+from benchmark import schema
+from benchmark import streaming
 
 st.set_page_config(
     page_title="Polars v Pandas", 
@@ -16,47 +28,219 @@ st.markdown("It is a feature that enables deferred computation for DataFrame ope
 st.markdown("Lazy execution is particularly beneficial when dealing with complex queries or large datasets where multiple operations can be combined and optimized before execution. It ensures minimal resource usage and maximum performance, making Polars a powerful choice for data processing.")
 st.markdown("Consider here, a 3 GB datafile of the Indian National Stock Exchange dataset and its subsequent filtered output")
 
+use_columnar_cache = st.toggle("Read from the columnar (Parquet) cache instead of raw CSV")
+execution_mode = st.radio("Polars execution mode", ["Streaming (bounded memory)", "In-memory collect"], horizontal=True)
+# The chunked workflow is pandas at its best on a file bigger than memory; the whole-file read is what most code does
+pandas_workflow = st.radio("Pandas workflow", ["Chunked", "Whole file"], horizontal=True,
+                           format_func=lambda workflow: {"Chunked": f"Chunked ({streaming.PANDAS_CHUNK_ROWS:,} rows at a time, partial aggregates)", "Whole file": "Whole file (read_csv, then filter and group by)"}[workflow])
+
+# One cache for the whole server, so reruns and other sessions reuse results instead of recomputing them
+@st.cache_resource
+def shared_result_cache():
+    return result_cache.ResultCache()
+
+query_results = shared_result_cache()
+if st.button("Invalidate cached results"):
+    query_results.invalidate()
+    st.toast("Cached results cleared")
+
 polars_column, pandas_column = st.columns(2)
 
 file_path = "combined_data3gb.csv"
 
-lazy_df = pl.scan_csv(file_path)
+if use_columnar_cache:
+    lazy_df = columnar_cache.scan_cached(file_path)
+else:
+    lazy_df = pl.scan_csv(file_path, schema_overrides=schema.POLARS_SCHEMA)
 
-# Show data size
+# Show data size, estimated from file metadata and a sample of rows instead of collecting the whole file
 polars_column.subheader("Polars Gets It Done Fast")
-polars_size_gb = lazy_df.collect().estimated_size() / (1024 ** 3)  # Convert bytes to GB
-polars_column.markdown(f"Polars DataFrame size: <span style='font-weight:bold'> {polars_size_gb:.2f} GB </span>", unsafe_allow_html=True)
+size_estimate = streaming.estimate_csv_size(file_path)
+file_size_gb = size_estimate["file_size_bytes"] / (1024 ** 3)  # Convert bytes to GB
+polars_size_gb = size_estimate["estimated_memory_bytes"] / (1024 ** 3)
+polars_column.markdown(f"File size on disk: <span style='font-weight:bold'> {file_size_gb:.2f} GB </span>, about <span style='font-weight:bold'> {size_estimate['estimated_rows']:,} </span> rows", unsafe_allow_html=True)
+polars_column.markdown(f"Estimated Polars DataFrame size if fully loaded: <span style='font-weight:bold'> {polars_size_gb:.2f} GB </span>", unsafe_allow_html=True)
 
 # Transformations
-transformed_lazy_df = (
-    lazy_df
-    .filter(pl.col("close") > 50)
-    .group_by("company")
-    .agg([
-        pl.col("volume").sum().alias("total_volume"),
-        pl.col("close").mean().alias("average_close"),
-    ])
-    .sort("company")
-)
+summary_stages = operations.company_summary_stages(lazy_df)
+filtered_lazy_df, aggregated_lazy_df, transformed_lazy_df = summary_stages.values()
+
+engine = "streaming" if execution_mode == "Streaming (bounded memory)" else "in-memory"
+
+# Function to run the Polars query and keep its measurements alongside the result. Heavy queries from
+# every session go through the shared admission gate, so the time is measured once it is admitted
+def compute_polars_result():
+    with admission.GATE.admit():
+        result_df, elapsed_time, peak_bytes = streaming.collect_measured(transformed_lazy_df, engine)
+    return result_df, {"time_s": elapsed_time, "peak_delta_bytes": peak_bytes}
 
+# Function to describe where a result came from
+def cached_note(tier):
+    return "" if tier == "computed" else f" (measured when first computed, now served from the {tier} cache)"
 
-polars_column.table(transformed_lazy_df.collect())
+polars_key = result_cache.cache_key([file_path], f"polars:{engine}:{transformed_lazy_df.explain(optimized=False)}")
+polars_result, polars_metadata, polars_tier = query_results.get_or_compute(polars_key, compute_polars_result)
+polars_column.table(polars_result)
+polars_column.markdown(f"Ran on the {engine} engine in <span style='font-weight:bold'> {polars_metadata['time_s']:.2f} s </span>, Peak RSS growth <span style='font-weight:bold'> {polars_metadata['peak_delta_bytes'] / (1024 ** 3):.2f} GB </span>{cached_note(polars_tier)}", unsafe_allow_html=True)
+
+# The comparisons below run the whole query again, so they only run when asked, through the shared
+# gate, and their last result is kept in the session to survive reruns
+if polars_column.button("Compare peak RSS of streaming vs in-memory collect"):
+    # Streaming runs first: memory freed by an in-memory collect is often kept by the allocator
+    # and would hide the streaming engine's own peak
+    engine_results = []
+    with admission.GATE.admit():
+        for compared_engine in ["streaming", "in-memory"]:
+            _, compared_time, compared_peak_bytes = streaming.collect_measured(transformed_lazy_df, compared_engine)
+            engine_results.append({
+                "Engine": compared_engine,
+                "Time (s)": round(compared_time, 2),
+                "Peak RSS Growth (GB)": round(compared_peak_bytes / (1024 ** 3), 3),
+            })
+    st.session_state["engine_comparison"] = engine_results
+if "engine_comparison" in st.session_state:
+    polars_column.table(st.session_state["engine_comparison"])
 
 ##PANDAS TRYNG TO RUN
+# Function to run the pandas workflow. The grouped result is cached as a Polars frame, so the
+# company index is kept as a column and restored on the way out
+def run_pandas_workflow():
+    if pandas_workflow == "Chunked":
+        grouped_df, elapsed_time, peak_bytes = streaming.aggregate_pandas_chunked(file_path, use_columnar_cache=use_columnar_cache)
+        # Only one chunk is ever held, so there is no whole-file frame to size
+        metadata = {"time_s": elapsed_time, "logical_size_bytes": None, "peak_delta_bytes": peak_bytes}
+        return pl.from_pandas(grouped_df.reset_index()), metadata
+
+    with memory.PeakRSSSampler() as pandas_sampler:
+        start_time = time.time()
+        if use_columnar_cache:
+            pandas_df = columnar_cache.read_cached_pandas(file_path)
+        else:
+            pandas_df = pd.read_csv(file_path, **schema.pandas_read_options())
+
+        # Transformations
+        filtered_df = pandas_df[pandas_df["close"] > 50]
+        grouped_df = filtered_df.groupby("company").agg(
+            total_volume=("volume", "sum"),
+            average_close=("close", "mean")
+        )
+        elapsed_time = time.time() - start_time
+
+    # memory_usage(deep=True) counts the string objects behind object columns
+    metadata = {
+        "time_s": elapsed_time,
+        "logical_size_bytes": memory.logical_size_bytes(pandas_df),
+        "peak_delta_bytes": pandas_sampler.peak_delta_bytes,
+    }
+    return pl.from_pandas(grouped_df.reset_index()), metadata
+
+# Function to run the pandas workflow once admitted through the shared gate
+def compute_pandas_result():
+    with admission.GATE.admit():
+        return run_pandas_workflow()
+
 try:
     # Creating a Pandas DataFrame
     pandas_column.subheader("Pandas Will Take Some Time (Or Crash)")
-    pandas_df = pd.read_csv(file_path)
+    pandas_key = result_cache.cache_key([file_path], f"pandas:{pandas_workflow}:columnar={use_columnar_cache}:filter close > 50, groupby company, sum volume, mean close")
+    pandas_result, pandas_metadata, pandas_tier = query_results.get_or_compute(pandas_key, compute_pandas_result)
+    grouped_df = pandas_result.to_pandas().set_index("company")
 
-    pandas_size_gb = round(sys.getsizeof(pandas_df)/1000000000, 1)
-    pandas_column.markdown(f"Pandas DataFrame size: <span style='font-weight:bold'> {pandas_size_gb:.2f} GB </span>", unsafe_allow_html=True)
-
-    # Transformations
-    filtered_df = pandas_df[pandas_df["close"] > 50]
-    grouped_df = filtered_df.groupby("company").agg(
-        total_volume=("volume", "sum"),
-        average_close=("close", "mean")
-    )
+    if pandas_metadata["logical_size_bytes"] is not None:
+        pandas_size_gb = memory.bytes_to_gb(pandas_metadata["logical_size_bytes"], 2)
+        pandas_column.markdown(f"Pandas DataFrame size: <span style='font-weight:bold'> {pandas_size_gb:.2f} GB </span>", unsafe_allow_html=True)
+    else:
+        pandas_column.markdown("Streamed in chunks: the whole file is never held as one DataFrame")
     pandas_column.table(grouped_df)
+    pandas_column.markdown(f"Read and transformed in <span style='font-weight:bold'> {pandas_metadata['time_s']:.2f} s </span>, Peak RSS growth <span style='font-weight:bold'> {memory.bytes_to_gb(pandas_metadata['peak_delta_bytes'], 2):.2f} GB </span>{cached_note(pandas_tier)}", unsafe_allow_html=True)
+
+    # Side by side: Polars' lazy query against the pandas workflow on the same file
+    st.table([
+        {"Workflow": f"Polars lazy ({engine})", "Time (s)": round(polars_metadata["time_s"], 2),
+         "Peak RSS Growth (GB)": memory.bytes_to_gb(polars_metadata["peak_delta_bytes"])},
+        {"Workflow": f"Pandas ({pandas_workflow.lower()})", "Time (s)": round(pandas_metadata["time_s"], 2),
+         "Peak RSS Growth (GB)": memory.bytes_to_gb(pandas_metadata["peak_delta_bytes"])},
+    ])
 except MemoryError as e:
-    pandas_column.markdown("Pandas workflow failed due to memory error:", e)
\ No newline at end of file
+    pandas_column.markdown("Pandas workflow failed due to memory error:", e)
+
+st.subheader("Read Time by File Format")
+# Both engines read the whole file, pandas included, so this waits for a slot like the queries above
+if st.button("Compare cold CSV and warm columnar read times"):
+    with admission.GATE.admit():
+        st.session_state["format_comparison"] = columnar_cache.compare_read_times([file_path])
+if "format_comparison" in st.session_state:
+    format_results, conversion_time = st.session_state["format_comparison"]
+    st.table(format_results)
+    st.markdown(f"One-off conversion to PARQUET for this run took <span style='font-weight:bold'> {conversion_time:.2f} s </span> (0 when the cache was already warm)", unsafe_allow_html=True)
+
+##QUERY PLANS AND PROFILING
+# Function to get one query's plans, what was pushed into the scan and timings of its nodes
+def describe_query_plan(lazy_query, time_stages):
+    timings, timing_source = plans.profile_query(lazy_query, time_stages)
+    return {
+        "unoptimized": plans.plan_text(lazy_query, optimized=False),
+        "optimized": plans.plan_text(lazy_query),
+        "pushdown": plans.pushdown_summary(lazy_query),
+        "timings": timings,
+        "timing_source": timing_source,
+    }
+
+# Function to show one query's plans, what was pushed into the scan and a timeline of its nodes
+def display_query_plan(container, query_plan):
+    unoptimized_column, optimized_column = container.columns(2)
+    unoptimized_column.markdown("Unoptimized plan")
+    unoptimized_column.code(query_plan["unoptimized"])
+    optimized_column.markdown("Optimized plan")
+    optimized_column.code(query_plan["optimized"])
+    container.markdown("Projection and predicate pushdown into the scan:")
+    container.table(query_plan["pushdown"])
+
+    timings, timing_source = query_plan["timings"], query_plan["timing_source"]
+    if timings and "start" in timings[0]:
+        container.markdown(f"Timeline ({timing_source}, microseconds):")
+        timeline_chart = alt.Chart(pd.DataFrame(timings)).mark_bar().encode(
+            x=alt.X("start:Q", title="Start (us)"),
+            x2="end:Q",
+            y=alt.Y("node:N", sort=None, title=None),
+            tooltip=["node", "start", "end"],
+        )
+        container.altair_chart(timeline_chart)
+        return
+
+    # Without per-node timings there is no timeline to draw, only each stage timed on its own
+    container.markdown(f"{timing_source}, microseconds. A stage's time is its own work only, but the stages lose the fusion the whole query gets, so together they take longer than the query.")
+    stage_chart = alt.Chart(pd.DataFrame(timings)).mark_bar().encode(
+        x=alt.X("time_us:Q", title="Time (us)"),
+        y=alt.Y("node:N", sort=None, title=None),
+        tooltip=["node", "time_us"],
+    )
+    container.altair_chart(stage_chart)
+
+st.subheader("Query Plans and Profiling")
+st.markdown("Polars builds a logical plan for every lazy query and optimizes it before running it. Compare the plans to see which columns and rows are dropped while reading, and use the per-node timings to find the slowest node.")
+
+# Profiling collects every query and each of its stages, so it runs only when asked, through the
+# shared gate, and the last profile is kept in the session
+if st.button("Profile the query plans"):
+    summary_source_lazy_df = lazy_df.select(operations.COMPANY_SUMMARY_COLUMNS)
+    queries = {"Filter, group by and sort (above)": (transformed_lazy_df, lambda: plans.profile_stages(
+        "scan", *plans.collect_timed(summary_source_lazy_df), operations.COMPANY_SUMMARY_STEPS))}
+    # The Speed page queries, over the same archive files the Speed page reads. They share the scan
+    # and column selection, which is collected and timed once, only if stages are timed at all
+    archive_files = manifest.discover("archive/*.csv")
+    if archive_files:
+        archive_lazy_df = loaders.scan_files(archive_files, use_columnar_cache)
+        context = operations.operation_context(archive_files)
+        selected_source = functools.cache(lambda: plans.collect_timed(archive_lazy_df.select(operations.SELECTED_COLUMNS)))
+        for operation, lazy_query in operations.lazy_queries(archive_lazy_df, context).items():
+            build = operations.POLARS_OPERATIONS[operation]
+            steps = [(operation, lambda stage_lazy_df, build=build: build(stage_lazy_df, context))]
+            queries[f"Speed page: {operation}"] = (lazy_query, lambda steps=steps: plans.profile_stages("scan + select", *selected_source(), steps))
+    with admission.GATE.admit():
+        st.session_state["query_plans"] = {name: describe_query_plan(lazy_query, time_stages) for name, (lazy_query, time_stages) in queries.items()}
+
+if "query_plans" in st.session_state:
+    query_plans = st.session_state["query_plans"]
+    for query_tab, query_plan in zip(st.tabs(list(query_plans)), query_plans.values()):
+        display_query_plan(query_tab, query_plan)
@@ -0,0 +1,71 @@
+import streamlit as st
+import glob
+import os
+import altair as alt
+import polars as pl
+from benchmark import history
+from benchmark import results
+
+st.set_page_config(
+    page_title="Polars v Pandas",
+    layout="wide",
+    page_icon="./icons/polars_logo.png"
+)
+
+st.title("Performance History")
+st.markdown(f"Every finished benchmark run, from the Speed page or from `python -m benchmark`, is appended to a Parquet dataset in {history.HISTORY_DIR}/, partitioned by date and host. Follow throughput and peak memory across runs to see whether a library upgrade or a config change made things slower.")
+
+# Runs saved before the history existed can be added once; importing a run twice does nothing
+saved_runs = sorted(glob.glob(os.path.join(results.RESULTS_DIR, "*.json")))
+if saved_runs and st.button(f"Import the {len(saved_runs)} runs saved in {results.RESULTS_DIR}/"):
+    for saved_run in saved_runs:
+        history.append_run(results.read_results(saved_run))
+
+history_df = history.load_history()
+if history_df.is_empty():
+    st.info("No runs recorded yet. Run the benchmark on the Speed page or with python -m benchmark")
+    st.stop()
+
+hosts = history_df["host"].unique().sort().to_list()
+host_column, operation_column, metric_column = st.columns(3)
+host = host_column.selectbox("Host", hosts)
+host_df = history_df.filter(pl.col("host") == host)
+operation = operation_column.selectbox("Operation", host_df["operation"].unique(maintain_order=True).to_list())
+metric = metric_column.radio("Metric", list(history.METRICS), format_func=lambda metric: history.METRICS[metric]["label"])
+size_tiers = host_df["size_tier_gb"].unique().sort().to_list()
+selected_tiers = st.multiselect("Size tiers (GB)", size_tiers, default=size_tiers)
+
+chart_df = (
+    host_df
+    .filter(pl.col("operation") == operation, pl.col("size_tier_gb").is_in(selected_tiers), pl.col(metric).is_not_null())
+    .with_columns(
+        (pl.col(metric) * history.METRICS[metric]["scale"]).alias("value"),
+        (pl.col("size_tier_gb").cast(pl.String) + " GB").alias("tier"),
+    )
+    .select("started_at", "engine", "tier", "value", "mode", "cache", "env_polars_version", "env_pandas_version")
+)
+if chart_df.is_empty():
+    st.warning("No runs recorded this metric for the selection")
+else:
+    history_chart = alt.Chart(chart_df.to_pandas()).mark_line(point=True).encode(
+        x=alt.X("started_at:T", title="Run started"),
+        y=alt.Y("value:Q", title=history.METRICS[metric]["label"]),
+        color="engine:N",
+        strokeDash="tier:N",
+        tooltip=["started_at:T", "engine", "tier", "value", "mode", "cache", "env_polars_version", "env_pandas_version"],
+    )
+    st.altair_chart(history_chart)
+
+# Regressions: each series' latest run against the median of the runs before it
+st.subheader("Regressions")
+threshold_column, baseline_column = st.columns(2)
+threshold_percent = threshold_column.slider("Flag changes worse than (%)", min_value=1, max_value=50, value=10)
+baseline_runs = baseline_column.number_input("Baseline: median of the previous N runs", min_value=1, value=5, step=1)
+for regression_metric in ["rows_per_s", "peak_rss_bytes"]:
+    regressions = history.find_regressions(host_df, regression_metric, threshold_percent / 100, baseline_runs)
+    label = history.METRICS[regression_metric]["label"]
+    if regressions:
+        st.error(f"{len(regressions)} series regressed on {label}")
+        st.table(regressions)
+    else:
+        st.success(f"No {label} regressions beyond {threshold_percent}%")